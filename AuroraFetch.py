@@ -1,10 +1,17 @@
-import multiprocessing
-multiprocessing.freeze_support()
+import time
+_T0 = time.perf_counter()
 
-import os, sys, re, shutil, threading, time, json, zipfile, tempfile
-import tkinter as tk
-import urllib.request
-from tkinter import ttk, messagebox, filedialog
+import os, sys, re, threading, json, heapq, itertools, struct, zlib
+import collections, contextlib, copy, functools, shutil
+
+if getattr(sys, "frozen", False):
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+# tkinter is only imported for the desktop UI so headless runs never load Tk. urllib.request,
+# zipfile, sqlite3 and hashlib are imported where they are used: none of them is
+# needed for the first paint, and together they add up in the frozen build.
+tk = ttk = messagebox = filedialog = None
 
 # ── Constants ─────────────────────────────────────────────────────────────────
 APP_NAME       = "AuroraFetch"
@@ -48,10 +55,52 @@ AuroraFetch doesnt rely on or really use any servers except for downloading yt-d
   AuroraFetch is open source. Contributions and feedback
   are welcome on GitHub.
 """
-FETCH_TIMEOUT  = 20   # seconds before fetch is considered hung
+FETCH_TIMEOUT  = 20   # seconds before a lookup is killed
+EXTRACT_WORKERS = 2   # lookup processes kept warm
+EXTRACT_BACKLOG = 32  # lookups allowed to wait for a worker before new ones are refused
+MAX_DOWNLOADS  = 3    # default number of jobs downloading at once
+MAX_PER_HOST   = 2    # default number of concurrent jobs against one site
+PP_WORKERS     = os.cpu_count() or 2   # ffmpeg post-processing runs at once
+PP_BACKLOG     = 2    # new downloads wait while this many files per ffmpeg slot await it
+PROGRESS_HZ    = 15   # how often the UI drains queued progress updates
+PREFETCH_DELAY = 600  # ms after the last edit before a pasted URL is looked up speculatively
+CLIPBOARD_POLL = 1000 # ms between clipboard checks while clipboard watching is on
+YDL_POOL_IDLE  = 8    # warm YoutubeDL instances kept between jobs
+BW_RATES       = [0, 1, 2, 5, 10, 25, 50]   # MB/s choices in the menu, 0 = unlimited
+BW_BURST       = 0.25   # seconds of traffic allowed back to back after an idle spell
+BW_AVG_WINDOW  = 3.0    # seconds the reported effective rate is averaged over
+FRAG_CHOICES   = [0, 1, 2, 4, 8, 16]   # fragment downloads per job in the menu, 0 = auto
+FRAG_START     = 4      # fragments fetched at once for a site with no measurements yet
+FRAG_MAX       = 16
+CHUNK_MIN      = 1_048_576
+CHUNK_MAX      = 32 * 1_048_576
+CHUNK_SECONDS  = 4      # HTTP chunks are sized to take about this long at the measured rate
+DISK_MARGIN    = 256 * 1_048_576   # always left free on the staging and output disks
 SETTINGS_DIR   = os.path.join(os.path.expanduser("~"), ".aurorafetch")
 SETTINGS_FILE  = os.path.join(SETTINGS_DIR, "settings.json")
 
+META_CACHE_FILE    = os.path.join(SETTINGS_DIR, "metadata.db")
+META_CACHE_BYTES   = 32 * 1_048_576   # LRU eviction above this payload size
+META_CACHE_TTL     = 6 * 3600         # plain metadata stays fresh this long
+META_SIGNED_TTL    = 30 * 60          # signed stream URLs without a visible expiry
+META_EXPIRY_MARGIN = 5 * 60           # drop signed entries this long before they expire
+INFO_MAX_BYTES     = 2 * 1_048_576    # larger info dicts are neither cached nor kept for reuse
+ART_CACHE_DIR      = os.path.join(SETTINGS_DIR, "artwork")
+ART_CACHE_BYTES    = 64 * 1_048_576   # converted cover art kept before LRU eviction
+STARTUP_FILE       = os.path.join(SETTINGS_DIR, "startup.jsonl")
+STARTUP_KEEP       = 200              # startup traces kept for spotting regressions
+ARCHIVE_FILE       = os.path.join(SETTINGS_DIR, "archive.db")
+JOURNAL_FILE       = os.path.join(SETTINGS_DIR, "journal.db")
+JOURNAL_INTERVAL   = 2.0              # seconds between progress writes per downloading job
+TELEMETRY_FILE     = os.path.join(SETTINGS_DIR, "telemetry.jsonl")
+TELEMETRY_BYTES    = 4 * 1_048_576    # rotate the job log above this size
+TELEMETRY_KEEP     = 3                # rotated logs kept (telemetry.jsonl.1 … .3)
+SERVICE_HOST       = "127.0.0.1"
+SERVICE_PORT       = 47811
+SERVICE_FILE       = os.path.join(SETTINGS_DIR, "service.json")   # port and pid of the running service
+SERVICE_KEEP       = 500              # finished jobs the service still lists
+SERVICE_MAX_BODY   = 1_048_576
+
 # ── Translations ─────────────────────────────────────────────────────────────
 TRANSLATIONS = {
     "en": {
@@ -98,12 +147,15 @@ TRANSLATIONS = {
         "ffmpeg_not_found": "ffmpeg was not found or could not be downloaded.\nCheck your internet connection and restart the app.",
         "fetching_info":    "Fetching video info…",
         "info_fetched":     "Info fetched — select options and click Download.",
+        "info_cached":      "Info loaded from cache — select options and click Download.",
         "fetch_error":      "Fetch Error",
         "fetch_err_msg":    "Could not fetch video info:\n\n",
         "starting_mp3":     "Starting MP3 download at {br} kbps…",
         "starting_video":   "Starting video download…",
         "downloading":      "Downloading… {pct:.1f}%",
         "post_processing":  "Post-processing…",
+        "merge_copy":       "stream copy",
+        "merge_aac":        "audio → AAC",
         "dl_complete":      "✔ {label} download complete!",
         "done":             "Done",
         "saved_to":         "{label} saved to:\n{path}",
@@ -114,9 +166,44 @@ TRANSLATIONS = {
         "ytdlp_not_avail2": "✘ yt-dlp not available — restart app",
         "ytdlp_updated":    " (just updated!)",
         "ytdlp_uptodate":   " (up to date)",
+        "ytdlp_checking":   " (checking for updates…)",
         "ffmpeg_disabled":  "⚠ ffmpeg not available — MP3 and high-res merging disabled",
         "best_auto":        "Best (auto-selected)",
         "needs_ffmpeg":     "  ⚠ needs ffmpeg",
+        "queue":            "  Queue  ",
+        "col_title":        "Title",
+        "col_state":        "Status",
+        "col_progress":     "Progress",
+        "parallel":         "Parallel downloads",
+        "bandwidth":        "Bandwidth limit",
+        "unlimited":        "Unlimited",
+        "resumed":          "Resuming {n} unfinished download(s)…",
+        "fragments":        "Fragment downloads",
+        "watch_clipboard":  "Look up copied URLs",
+        "staging":          "Staging folder",
+        "staging_choose":   "Choose…",
+        "staging_off":      "None — download straight to the output folder",
+        "waiting_space":    "Waiting for disk space ({mb} MB needed)…",
+        "auto":             "Auto",
+        "tuning_frag":      "{n} fragments at once",
+        "tuning_chunk":     "{mb} MB chunks",
+        "queued_n":         "Queued {n} downloads.",
+        "all_finished":     "✔ All downloads finished — {ok} done, {bad} failed.",
+        "queued":           "Queued",
+        "extracting":       "Extracting…",
+        "downloading_st":   "Downloading",
+        "post-processing":  "Post-processing",
+        "failed":           "Failed",
+        "aborted":          "Aborted",
+        "skipped":          "Already downloaded",
+        "dl_skipped":       "✔ Already downloaded — {path}",
+        "items":            "Items:",
+        "playlist":         "Playlist: {title}",
+        "playlist_count":   "{n} items",
+        "playlist_fetched": "Playlist found — items are queued as they are listed. Use Items (e.g. 1-50) to pick a range.",
+        "expanding":        "Listing playlist… {n} items queued so far.",
+        "expanded":         "Playlist listed — {n} items queued.",
+        "bad_items":        "Items must look like 1-50, 20-, -20 or 20.",
     },
     "tr": {
         "dep_status":       "  Bağımlılık Durumu  ",
@@ -162,12 +249,15 @@ TRANSLATIONS = {
         "ffmpeg_not_found": "ffmpeg bulunamadı veya indirilemedi.\nİnternet bağlantınızı kontrol edip uygulamayı yeniden başlatın.",
         "fetching_info":    "Video bilgisi getiriliyor…",
         "info_fetched":     "Bilgi alındı — seçenekleri belirleyip İndir'e tıklayın.",
+        "info_cached":      "Bilgi önbellekten yüklendi — seçenekleri belirleyip İndir'e tıklayın.",
         "fetch_error":      "Getirme Hatası",
         "fetch_err_msg":    "Video bilgisi alınamadı:\n\n",
         "starting_mp3":     "{br} kbps'de MP3 indirmesi başlatılıyor…",
         "starting_video":   "Video indirmesi başlatılıyor…",
         "downloading":      "İndiriliyor… {pct:.1f}%",
         "post_processing":  "İşleniyor…",
+        "merge_copy":       "akış kopyalama",
+        "merge_aac":        "ses → AAC",
         "dl_complete":      "✔ {label} indirmesi tamamlandı!",
         "done":             "Tamamlandı",
         "saved_to":         "{label} şuraya kaydedildi:\n{path}",
@@ -178,9 +268,44 @@ TRANSLATIONS = {
         "ytdlp_not_avail2": "✘ yt-dlp kullanılamıyor — uygulamayı yeniden başlatın",
         "ytdlp_updated":    " (güncellendi!)",
         "ytdlp_uptodate":   " (güncel)",
+        "ytdlp_checking":   " (güncellemeler denetleniyor…)",
         "ffmpeg_disabled":  "⚠ ffmpeg kullanılamıyor — MP3 ve yüksek çözünürlüklü birleştirme devre dışı",
         "best_auto":        "En İyi (otomatik)",
         "needs_ffmpeg":     "  ⚠ ffmpeg gerekli",
+        "queue":            "  Kuyruk  ",
+        "col_title":        "Başlık",
+        "col_state":        "Durum",
+        "col_progress":     "İlerleme",
+        "parallel":         "Eşzamanlı indirmeler",
+        "bandwidth":        "Bant genişliği sınırı",
+        "unlimited":        "Sınırsız",
+        "resumed":          "{n} yarım kalan indirme sürdürülüyor…",
+        "fragments":        "Parça indirmeleri",
+        "watch_clipboard":  "Kopyalanan URL'leri önceden getir",
+        "staging":          "Hazırlık klasörü",
+        "staging_choose":   "Seç…",
+        "staging_off":      "Yok — doğrudan çıktı klasörüne indir",
+        "waiting_space":    "Disk alanı bekleniyor ({mb} MB gerekli)…",
+        "auto":             "Otomatik",
+        "tuning_frag":      "aynı anda {n} parça",
+        "tuning_chunk":     "{mb} MB parçalar",
+        "queued_n":         "{n} indirme kuyruğa eklendi.",
+        "all_finished":     "✔ Tüm indirmeler bitti — {ok} tamamlandı, {bad} başarısız.",
+        "queued":           "Kuyrukta",
+        "extracting":       "Bilgi alınıyor…",
+        "downloading_st":   "İndiriliyor",
+        "post-processing":  "İşleniyor",
+        "failed":           "Başarısız",
+        "aborted":          "İptal edildi",
+        "skipped":          "Zaten indirildi",
+        "dl_skipped":       "✔ Zaten indirildi — {path}",
+        "items":            "Öğeler:",
+        "playlist":         "Oynatma listesi: {title}",
+        "playlist_count":   "{n} öğe",
+        "playlist_fetched": "Oynatma listesi bulundu — öğeler listelendikçe kuyruğa eklenir. Aralık seçmek için Öğeler'i kullanın (ör. 1-50).",
+        "expanding":        "Oynatma listesi taranıyor… şu ana kadar {n} öğe kuyrukta.",
+        "expanded":         "Oynatma listesi tarandı — {n} öğe kuyruğa eklendi.",
+        "bad_items":        "Öğeler 1-50, 20-, -20 veya 20 biçiminde olmalıdır.",
     },
 }
 
@@ -196,6 +321,30 @@ def _save_settings(data):
     with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
         f.write(json.dumps(data, indent=2))
 
+# ── Startup trace ─────────────────────────────────────────────────────────────
+STARTUP_TRACE = {}   # phase -> seconds since this module started loading
+
+def _trace(phase):
+    STARTUP_TRACE.setdefault(phase, round(time.perf_counter() - _T0, 4))
+
+def _save_trace():
+    # Appended to startup.jsonl on every launch; AURORAFETCH_TRACE=1 also prints it
+    entry = json.dumps({"time": round(time.time(), 3), "version": APP_VERSION,
+                        "frozen": IS_FROZEN, "phases": STARTUP_TRACE})
+    if os.environ.get("AURORAFETCH_TRACE") and sys.stderr:
+        print(entry, file=sys.stderr)
+    try:
+        os.makedirs(SETTINGS_DIR, exist_ok=True)
+        try:
+            with open(STARTUP_FILE, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()[-(STARTUP_KEEP - 1):]
+        except OSError:
+            lines = []
+        with open(STARTUP_FILE, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines + [entry]) + "\n")
+    except OSError:
+        pass
+
 # ── Globals ───────────────────────────────────────────────────────────────────
 IS_FROZEN      = getattr(sys, "frozen", False)
 yt_dlp         = None
@@ -211,45 +360,318 @@ else:
     except NameError:
         APP_DIR = os.getcwd()
 
-DEPS_DIR   = os.path.join(APP_DIR, "ytdl_deps")
-YTDLP_EXE  = os.path.join(DEPS_DIR, "yt-dlp.exe" if sys.platform == "win32" else "yt-dlp")
-FFMPEG_EXE = os.path.join(DEPS_DIR, "ffmpeg.exe" if sys.platform == "win32" else "ffmpeg")
-YTDLP_VERF = os.path.join(DEPS_DIR, "yt-dlp.version")
+DEPS_DIR    = os.path.join(APP_DIR, "ytdl_deps")
+YTDLP_EXE   = os.path.join(DEPS_DIR, "yt-dlp.exe" if sys.platform == "win32" else "yt-dlp")
+FFMPEG_EXE  = os.path.join(DEPS_DIR, "ffmpeg.exe" if sys.platform == "win32" else "ffmpeg")
+YTDLP_VERF  = os.path.join(DEPS_DIR, "yt-dlp.version")
+RELEASES    = os.path.join(DEPS_DIR, "releases.json")   # cached GitHub release lookups
+RELEASE_TTL = 6 * 3600   # seconds a cached release lookup is trusted without asking
+
+DL_CONNECTIONS = 4                 # parallel range requests per dependency download
+DL_MIN_PART    = 4 * 1_048_576     # no range is split smaller than this
+DL_BLOCK       = 256 * 1024
+DL_RETRIES     = 4
 
 
 # ── Network helpers ───────────────────────────────────────────────────────────
 
-def _http_json(url):
-    req = urllib.request.Request(url, headers={"User-Agent": "AuroraFetch/1.0"})
-    with urllib.request.urlopen(req, timeout=15) as r:
+def _request(url, headers=None):
+    import urllib.request
+    return urllib.request.Request(url, headers={"User-Agent": "AuroraFetch/1.0", **(headers or {})})
+
+def _urlopen(req, timeout):
+    import urllib.request
+    return urllib.request.urlopen(req, timeout=timeout)
+
+def _http_json(url, headers=None):
+    with _urlopen(_request(url, headers), 15) as r:
         return json.loads(r.read())
 
-def _download_file(url, dest, on_progress=None):
-    req = urllib.request.Request(url, headers={"User-Agent": "AuroraFetch/1.0"})
-    with urllib.request.urlopen(req, timeout=120) as r:
-        total = int(r.headers.get("Content-Length", 0))
-        done  = 0
-        with open(dest, "wb") as f:
+def _probe(url):
+    # A one-byte range request tells us the size, whether ranges work and a validator
+    req = _request(url, {"Range": "bytes=0-0"})
+    with _urlopen(req, 30) as r:
+        validator = r.headers.get("ETag") or r.headers.get("Last-Modified")
+        m = re.match(r"bytes 0-0/(\d+)", r.headers.get("Content-Range") or "")
+        if r.status == 206 and m:
+            return int(m.group(1)), True, validator, r.geturl()
+        return int(r.headers.get("Content-Length") or 0), False, validator, r.geturl()
+
+def _fetch_range(url, path, seg, lock, on_chunk):
+    start, end = seg[0] + seg[2], seg[1]
+    if start > end: return
+    req = _request(url, {"Range": f"bytes={start}-{end}"})
+    with _urlopen(req, 120) as r, open(path, "r+b") as f:
+        if r.status != 206:
+            raise IOError(f"server ignored range request (HTTP {r.status})")
+        f.seek(start)
+        while start <= end:
+            chunk = r.read(min(DL_BLOCK, end - start + 1))
+            if not chunk: raise IOError("connection closed mid-range")
+            f.write(chunk)
+            start += len(chunk)
+            with lock:
+                seg[2] += len(chunk)
+            on_chunk(len(chunk))
+
+def _download_file(url, dest, on_progress=None, sha256=None, connections=DL_CONNECTIONS):
+    part, sidecar = dest + ".part", dest + ".part.json"
+    total, ranged, validator, real_url = _probe(url)
+
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            state = json.loads(f.read())
+        if (state["url"], state["total"], state["validator"]) != (url, total, validator) \
+                or os.path.getsize(part) != total:
+            raise ValueError("stale download state")
+    except Exception:
+        state = None
+
+    if not (ranged and total):
+        # No range support: a single stream from the start, nothing to resume
+        with _urlopen(_request(real_url), 120) as r, open(part, "wb") as f:
+            done = 0
             while True:
-                chunk = r.read(65536)
+                chunk = r.read(DL_BLOCK)
                 if not chunk: break
                 f.write(chunk)
                 done += len(chunk)
                 if on_progress and total:
                     on_progress(done, total)
+    else:
+        if state is None:
+            n     = max(1, min(connections, total // DL_MIN_PART))
+            step  = -(-total // n)
+            state = {"url": url, "total": total, "validator": validator,
+                     "ranges": [[i, min(i + step, total) - 1, 0] for i in range(0, total, step)]}
+            with open(part, "wb") as f:
+                f.truncate(total)
+
+        lock   = threading.Lock()
+        done   = [sum(seg[2] for seg in state["ranges"])]
+        saved  = [time.monotonic()]
+        errors = []
+
+        def save_state():
+            with open(sidecar, "w", encoding="utf-8") as f:
+                f.write(json.dumps(state))
+
+        def on_chunk(n):
+            with lock:
+                done[0] += n
+                if time.monotonic() - saved[0] > 1:
+                    saved[0] = time.monotonic()
+                    save_state()
+                if on_progress: on_progress(done[0], total)
+
+        def worker(seg):
+            for attempt in range(DL_RETRIES):
+                try:
+                    _fetch_range(real_url, part, seg, lock, on_chunk)
+                    return
+                except Exception as e:
+                    if attempt == DL_RETRIES - 1:
+                        errors.append(e)
+                        return
+                    time.sleep(1 + attempt)
+
+        save_state()
+        threads = [threading.Thread(target=worker, args=(seg,), daemon=True)
+                   for seg in state["ranges"] if seg[0] + seg[2] <= seg[1]]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        with lock:
+            save_state()
+        if errors:
+            raise errors[0]
+
+    if sha256:
+        import hashlib
+        h = hashlib.sha256()
+        with open(part, "rb") as f:
+            for block in iter(lambda: f.read(1_048_576), b""):
+                h.update(block)
+        if h.hexdigest() != sha256.lower():
+            for p in (part, sidecar):
+                try: os.remove(p)
+                except OSError: pass
+            raise ValueError(f"SHA-256 mismatch for {os.path.basename(dest)}")
+
+    os.replace(part, dest)
+    try: os.remove(sidecar)
+    except OSError: pass
+
+def _published_sha256(sums_url, fname):
+    try:
+        with _urlopen(_request(sums_url), 15) as r:
+            for line in r.read().decode("utf-8", "replace").splitlines():
+                parts = line.split()
+                if len(parts) == 2 and parts[1].lstrip("*") == fname:
+                    return parts[0].lower()
+    except Exception:
+        pass
+    return None
 
 def _github_latest(repo):
-    return _http_json(f"https://api.github.com/repos/{repo}/releases/latest")["tag_name"]
+    try:
+        with open(RELEASES, "r", encoding="utf-8") as f:
+            cache = json.loads(f.read())
+    except Exception:
+        cache = {}
+    entry = cache.get(repo) or {}
+    if entry.get("tag") and time.time() - entry.get("checked", 0) < RELEASE_TTL:
+        return entry["tag"]
+
+    # An unchanged release answers If-None-Match with an empty 304
+    headers = {"If-None-Match": entry["etag"]} if entry.get("tag") and entry.get("etag") else {}
+    url     = f"https://api.github.com/repos/{repo}/releases/latest"
+    import urllib.error
+    try:
+        with _urlopen(_request(url, headers), 15) as r:
+            entry = {"tag": json.loads(r.read())["tag_name"], "etag": r.headers.get("ETag")}
+    except urllib.error.HTTPError as e:
+        if e.code != 304: raise
+    entry["checked"] = time.time()
+    cache[repo] = entry
+    try:
+        with open(RELEASES, "w", encoding="utf-8") as f:
+            f.write(json.dumps(cache, indent=2))
+    except OSError:
+        pass
+    return entry["tag"]
+
+
+# ── Remote zip ────────────────────────────────────────────────────────────────
+
+class RemoteZip:
+    # Reads a zip over HTTP range requests: the central directory first, then only
+    # the bytes of the members that are actually extracted.
+
+    def __init__(self, url):
+        self.size, ranged, _, self.url = _probe(url)
+        if not ranged or not self.size:
+            raise IOError("server does not support range requests")
+        self.members = self._read_directory()
+
+    def _get(self, start, end):
+        req = _request(self.url, {"Range": f"bytes={start}-{end}"})
+        with _urlopen(req, 60) as r:
+            if r.status != 206:
+                raise IOError(f"server ignored range request (HTTP {r.status})")
+            return r.read()
+
+    def _read_directory(self):
+        import zipfile
+        tail_at = max(0, self.size - (22 + 65535 + 20))
+        tail    = self._get(tail_at, self.size - 1)
+        eocd    = tail.rfind(b"PK\x05\x06")
+        if eocd < 0:
+            raise zipfile.BadZipFile("end of central directory not found")
+        count, cd_size, cd_at = struct.unpack("<10xHII", tail[eocd:eocd + 20])
+        if 0xFFFFFFFF in (cd_size, cd_at) or count == 0xFFFF:
+            loc = tail.rfind(b"PK\x06\x07", 0, eocd)
+            z64 = struct.unpack("<8xQ", tail[loc:loc + 16])[0]
+            rec = self._get(z64, z64 + 55)
+            count, cd_size, cd_at = struct.unpack("<32xQQQ", rec[:56])
+
+        if cd_at >= tail_at:
+            cd = tail[cd_at - tail_at:cd_at - tail_at + cd_size]
+        else:
+            cd = self._get(cd_at, cd_at + cd_size - 1)
+
+        members, pos = {}, 0
+        for _ in range(count):
+            (sig, flags, method, crc, csize, usize,
+             nlen, elen, clen, offset) = struct.unpack("<4s4xHH4xIIIHHH8xI", cd[pos:pos + 46])
+            if sig != b"PK\x01\x02":
+                raise zipfile.BadZipFile("corrupt central directory")
+            name  = cd[pos + 46:pos + 46 + nlen].decode("utf-8" if flags & 0x800 else "cp437")
+            extra = cd[pos + 46 + nlen:pos + 46 + nlen + elen]
+            csize, usize, offset = self._zip64_sizes(extra, csize, usize, offset)
+            members[name] = (method, crc, csize, usize, offset)
+            pos += 46 + nlen + elen + clen
+        return members
+
+    @staticmethod
+    def _zip64_sizes(extra, csize, usize, offset):
+        i = 0
+        while i + 4 <= len(extra):
+            hid, hlen = struct.unpack("<HH", extra[i:i + 4])
+            if hid == 0x0001:
+                vals = list(struct.unpack(f"<{hlen // 8}Q", extra[i + 4:i + 4 + hlen // 8 * 8]))
+                if usize  == 0xFFFFFFFF and vals: usize  = vals.pop(0)
+                if csize  == 0xFFFFFFFF and vals: csize  = vals.pop(0)
+                if offset == 0xFFFFFFFF and vals: offset = vals.pop(0)
+            i += 4 + hlen
+        return csize, usize, offset
+
+    def find(self, suffix):
+        return next((n for n in self.members if n.endswith(suffix)), None)
+
+    def extract(self, name, dest, on_progress=None):
+        import zipfile
+        method, crc, csize, usize, offset = self.members[name]
+        if method not in (0, 8):
+            raise zipfile.BadZipFile(f"unsupported compression method {method}")
+        nlen, elen = struct.unpack("<HH", self._get(offset + 26, offset + 29))
+        start   = offset + 30 + nlen + elen
+        inflate = zlib.decompressobj(-15) if method == 8 else None
+        part    = dest + ".part"
+        got, out = 0, [0, 0]   # compressed bytes read; [bytes written, running CRC]
+
+        def write(f, data):
+            f.write(data)
+            out[0] += len(data)
+            out[1]  = zlib.crc32(data, out[1])
+
+        req = _request(self.url, {"Range": f"bytes={start}-{start + csize - 1}"})
+        with _urlopen(req, 120) as r, open(part, "wb") as f:
+            if r.status != 206:
+                raise IOError(f"server ignored range request (HTTP {r.status})")
+            while got < csize:
+                chunk = r.read(min(DL_BLOCK, csize - got))
+                if not chunk: raise IOError("connection closed mid-member")
+                got += len(chunk)
+                if not inflate:
+                    write(f, chunk)
+                # Inflate in bounded steps so a highly compressed block cannot balloon
+                while inflate and chunk:
+                    write(f, inflate.decompress(chunk, DL_BLOCK))
+                    chunk = inflate.unconsumed_tail
+                if on_progress: on_progress(got, csize)
+            if inflate:
+                write(f, inflate.flush())
+
+        done, check = out
+        if done != usize or check != crc:
+            os.remove(part)
+            raise zipfile.BadZipFile(f"CRC check failed for {name}")
+        os.replace(part, dest)
 
 
 # ── yt-dlp bootstrap ──────────────────────────────────────────────────────────
 
-def ensure_yt_dlp(on_status=None):
-    global yt_dlp, YT_DLP_VERSION, YT_DLP_UPDATED
+def _import_yt_dlp():
+    global yt_dlp, YT_DLP_VERSION
+    try:
+        import yt_dlp as _ydl
+        yt_dlp = _ydl
+        YT_DLP_VERSION = _ydl.version.__version__
+        _trace("yt_dlp")
+    except ImportError:
+        yt_dlp = None
+
+def ensure_yt_dlp(on_status=None, on_ready=None):
+    global YT_DLP_VERSION, YT_DLP_UPDATED
     os.makedirs(DEPS_DIR, exist_ok=True)
 
     if on_status: on_status("Checking yt-dlp…")
 
+    # An importable yt-dlp is usable right away; the release check only refreshes the binary
+    _import_yt_dlp()
+    if yt_dlp is not None and on_ready:
+        on_ready(); on_ready = None
+
     try:
         latest_tag = _github_latest("yt-dlp/yt-dlp")
     except Exception:
@@ -266,34 +688,50 @@ def ensure_yt_dlp(on_status=None):
         tag   = latest_tag or stored or "2025.01.26"
         fname = "yt-dlp.exe" if sys.platform == "win32" else (
                 "yt-dlp_macos" if sys.platform == "darwin" else "yt-dlp")
-        url   = f"https://github.com/yt-dlp/yt-dlp/releases/download/{tag}/{fname}"
+        base  = f"https://github.com/yt-dlp/yt-dlp/releases/download/{tag}"
         if on_status: on_status(f"Downloading yt-dlp {tag}…")
         try:
-            _download_file(url, YTDLP_EXE)
+            _download_file(f"{base}/{fname}", YTDLP_EXE,
+                           sha256=_published_sha256(f"{base}/SHA2-256SUMS", fname))
             if sys.platform != "win32":
                 os.chmod(YTDLP_EXE, 0o755)
             open(YTDLP_VERF, "w").write(tag)
             YT_DLP_UPDATED = True
-            YT_DLP_VERSION = tag
+            if yt_dlp is None: YT_DLP_VERSION = tag
         except Exception as e:
             if on_status: on_status(f"yt-dlp download failed: {e}")
-    else:
+    elif yt_dlp is None:
         YT_DLP_VERSION = stored or "unknown"
 
-    try:
-        import yt_dlp as _ydl
-        yt_dlp = _ydl
-        YT_DLP_VERSION = _ydl.version.__version__
-    except ImportError:
-        yt_dlp = None
+    if yt_dlp is None:
+        _import_yt_dlp()
+    if on_ready: on_ready()
 
     if on_status: on_status(f"yt-dlp {YT_DLP_VERSION} ready.")
 
+def bootstrap_deps(on_status=None, on_ready=None):
+    # yt-dlp and ffmpeg are checked side by side. on_ready fires as soon as yt-dlp imports
+    # and ffmpeg has been looked up; this returns once the yt-dlp update check is done too.
+    ytdlp_ready = threading.Event()
+    def check_ytdlp():
+        try:
+            ensure_yt_dlp(on_status, ytdlp_ready.set)
+        finally:
+            ytdlp_ready.set()
+    ff = threading.Thread(target=ensure_ffmpeg, args=(on_status,), daemon=True)
+    up = threading.Thread(target=check_ytdlp, daemon=True)
+    ff.start(); up.start()
+    ff.join(); _trace("ffmpeg")
+    ytdlp_ready.wait()
+    if on_ready: on_ready()
+    up.join()
+
 
 # ── ffmpeg bootstrap ──────────────────────────────────────────────────────────
 
 def ensure_ffmpeg(on_status=None):
     global FFMPEG_PATH
+    import zipfile
 
     if os.path.isfile(FFMPEG_EXE):
         FFMPEG_PATH = FFMPEG_EXE; return
@@ -311,17 +749,33 @@ def ensure_ffmpeg(on_status=None):
         return
 
     if on_status: on_status("Downloading ffmpeg from GitHub…")
-    zip_url  = ("https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/"
-                "ffmpeg-master-latest-win64-gpl.zip")
-    zip_path = os.path.join(tempfile.gettempdir(), "ffmpeg_dl.zip")
+    base     = "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest"
+    zip_name = "ffmpeg-master-latest-win64-gpl.zip"
+    zip_path = os.path.join(DEPS_DIR, "ffmpeg_dl.zip")
+    os.makedirs(DEPS_DIR, exist_ok=True)
+
+    # Only ffmpeg.exe is needed, so read it straight out of the remote archive
+    try:
+        rz     = RemoteZip(f"{base}/{zip_name}")
+        member = rz.find("/bin/ffmpeg.exe")
+        if member:
+            rz.extract(member, FFMPEG_EXE)
+            FFMPEG_PATH = FFMPEG_EXE
+            if on_status: on_status("ffmpeg ready.")
+            return
+    except Exception:
+        pass
+
     try:
-        _download_file(zip_url, zip_path)
+        _download_file(f"{base}/{zip_name}", zip_path,
+                       sha256=_published_sha256(f"{base}/checksums.sha256", zip_name))
         if on_status: on_status("Extracting ffmpeg…")
         with zipfile.ZipFile(zip_path, "r") as z:
             for member in z.namelist():
                 if member.endswith("/bin/ffmpeg.exe"):
-                    with z.open(member) as src, open(FFMPEG_EXE, "wb") as dst:
-                        dst.write(src.read())
+                    with z.open(member) as src, open(FFMPEG_EXE + ".part", "wb") as dst:
+                        shutil.copyfileobj(src, dst, DL_BLOCK)
+                    os.replace(FFMPEG_EXE + ".part", FFMPEG_EXE)
                     break
         try: os.remove(zip_path)
         except: pass
@@ -334,15 +788,1669 @@ def ensure_ffmpeg(on_status=None):
         if on_status: on_status(f"ffmpeg download failed: {e}")
 
 
-# ── URL cleaner ───────────────────────────────────────────────────────────────
+# ── URL normalizer ────────────────────────────────────────────────────────────
+
+# site, hosts (without "www."), pattern matched against path[?query], canonical URL, key id.
+# The site names are yt-dlp's extractor keys in lower case, and the key id is the id yt-dlp
+# reports, so url_key and info_key agree for the archive. Rules without a key id only
+# canonicalise. Share parameters are site-specific tracking, dropped from that site's URLs
+# that no rule matches; other URLs only lose the generic ones.
+_YT_HOSTS = ("youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com")
+URL_RULES = [
+    ("youtube", _YT_HOSTS, r"/watch/?\?(?:[^#]*&)?v=(?P<id>[\w-]{11})(?![\w-])",
+     "https://www.youtube.com/watch?v={id}", "{id}"),
+    ("youtube", _YT_HOSTS, r"/embed/videoseries/?\?(?:[^#]*&)?list=(?P<id>[\w-]+)",
+     "https://www.youtube.com/playlist?list={id}", None),
+    ("youtube", _YT_HOSTS, r"/(?:shorts|embed|live|v|e)/(?!videoseries\b)(?P<id>[\w-]{11})(?![\w-])",
+     "https://www.youtube.com/watch?v={id}", "{id}"),
+    ("youtube", ("youtu.be",), r"/(?P<id>[\w-]{11})(?![\w-])",
+     "https://www.youtube.com/watch?v={id}", "{id}"),
+    ("youtube", _YT_HOSTS, r"/playlist/?\?(?:[^#]*&)?list=(?P<id>[\w-]+)",
+     "https://www.youtube.com/playlist?list={id}", None),
+    ("vimeo", ("vimeo.com",), r"/(?:channels/[\w-]+/)?(?P<id>\d+)/?(?:$|\?(?![^#]*\bh=))",
+     "https://vimeo.com/{id}", "{id}"),
+    ("vimeo", ("player.vimeo.com",), r"/video/(?P<id>\d+)/?(?:$|\?(?![^#]*\bh=))",
+     "https://vimeo.com/{id}", "{id}"),
+    ("dailymotion", ("dailymotion.com", "geo.dailymotion.com"),
+     r"/(?:embed/)?video/(?P<id>[a-z0-9]+)", "https://www.dailymotion.com/video/{id}", "{id}"),
+    ("dailymotion", ("dai.ly",), r"/(?P<id>[a-z0-9]+)/?(?:$|\?)",
+     "https://www.dailymotion.com/video/{id}", "{id}"),
+    ("tiktok", ("tiktok.com", "m.tiktok.com"), r"/(?P<user>@[\w.-]+)/video/(?P<id>\d+)",
+     "https://www.tiktok.com/{user}/video/{id}", "{id}"),
+    ("instagram", ("instagram.com",), r"/(?:[\w.]+/)?(?:p|reels?|tv)/(?P<id>[\w-]+)",
+     "https://www.instagram.com/p/{id}/", "{id}"),
+    ("twitter", ("twitter.com", "x.com", "mobile.twitter.com", "mobile.x.com"),
+     r"/(?:i/web|[\w]+)/status(?:es)?/(?P<id>\d+)", "https://twitter.com/i/status/{id}", "{id}"),
+    ("twitchvod", ("twitch.tv", "m.twitch.tv"), r"/videos/(?P<id>\d+)",
+     "https://www.twitch.tv/videos/{id}", "v{id}"),
+    ("twitchclips", ("clips.twitch.tv",), r"/(?P<id>[\w-]+)/?(?:$|\?)",
+     "https://clips.twitch.tv/{id}", None),
+    ("twitchclips", ("twitch.tv", "m.twitch.tv"), r"/\w+/clip/(?P<id>[\w-]+)",
+     "https://clips.twitch.tv/{id}", None),
+    ("streamable", ("streamable.com",), r"/(?:[eos]/)?(?P<id>\w+)/?(?:$|\?)",
+     "https://streamable.com/{id}", "{id}"),
+    ("reddit", ("reddit.com", "old.reddit.com", "new.reddit.com", "np.reddit.com", "m.reddit.com"),
+     r"/r/(?P<sub>\w+)/comments/(?P<id>\w+)", "https://www.reddit.com/r/{sub}/comments/{id}/", None),
+    ("reddit", ("redd.it",), r"/(?P<id>\w+)/?(?:$|\?)", "https://www.reddit.com/comments/{id}/", None),
+    ("soundcloud", ("soundcloud.com", "m.soundcloud.com"), r"/(?P<path>[\w-]+/[\w-]+(?:/[\w-]+)?)/?(?:$|\?)",
+     "https://soundcloud.com/{path}", None),
+]
+
+SHARE_PARAMS = {
+    "youtube":   r"si|feature|pp",
+    "instagram": r"igsh|igshid",
+    "tiktok":    r"is_from_webapp|sender_device",
+    "twitter":   r"ref_src|ref_url",
+}
 
-def clean_url(url):
+def _tracking_re(share=None):
+    return re.compile(r"(?:^|&)(?:utm_\w+|fbclid|gclid" + (f"|{share}" if share else "") + r")=[^&]*")
+
+_TRACKING_RE = _tracking_re()
+_RULES       = {}   # host -> [(site, compiled pattern, canonical, key id)]
+_TRACKING    = {}   # host -> tracking pattern including that site's share parameters
+for _site, _hosts, _pattern, _canon, _kid in URL_RULES:
+    for _host in _hosts:
+        _RULES.setdefault(_host, []).append((_site, re.compile(_pattern), _canon, _kid))
+        if _site in SHARE_PARAMS and _host not in _TRACKING:
+            _TRACKING[_host] = _tracking_re(SHARE_PARAMS[_site])
+
+_URL_RE      = re.compile(r"(?:(https?)://)?(?:www\.)?([\w.-]+\.[a-z]{2,})(?::\d+)?(/[^?#]*)?(?:\?([^#]*))?(#.*)?",
+                          re.I)
+
+@functools.lru_cache(maxsize=8192)
+def normalize_url(url):
+    # -> (canonical URL, (site, id) or None). Known sites get one canonical form and a key;
+    # other http(s) URLs only lose tracking parameters; anything else comes back as is.
     url = url.strip().strip(".")
-    vid = re.search(r'[?&]v=([a-zA-Z0-9_-]{11})', url)
-    if vid: return f"https://www.youtube.com/watch?v={vid.group(1)}"
-    ys = re.search(r'https?://youtu\.be/([a-zA-Z0-9_-]{11})', url)
-    if ys: return f"https://www.youtube.com/watch?v={ys.group(1)}"
-    return url
+    m = _URL_RE.fullmatch(url)
+    if not m: return url, None
+    scheme, host, path, query, frag = m.groups()
+    host = host.lower()
+    tail = (path or "/") + ("?" + query if query else "")
+    for site, pattern, canon, kid in _RULES.get(host, ()):
+        r = pattern.match(tail)
+        if r:
+            return canon.format(**r.groupdict()), (site, kid.format(**r.groupdict())) if kid else None
+    if not scheme or not query: return url, None
+    query = _TRACKING.get(host, _TRACKING_RE).sub("", query).lstrip("&")
+    return url[:m.start(4) - 1] + ("?" + query if query else "") + (frag or ""), None
+
+def clean_url(url):
+    return normalize_url(url)[0]
+
+def url_key(url):
+    # (extractor, id) when the URL alone identifies the video, else None
+    return normalize_url(url)[1]
+
+def dedupe_urls(urls):
+    # Canonical URLs in first-seen order, one per video; the same video pasted as a
+    # watch link, a short link and a Shorts link is only looked up once
+    seen, out = set(), []
+    for u in urls:
+        canon, key = normalize_url(u)
+        if (key or canon) not in seen:
+            seen.add(key or canon)
+            out.append(canon)
+    return out
+
+def info_key(info):
+    ie, vid = (info or {}).get("extractor_key") or (info or {}).get("ie_key"), (info or {}).get("id")
+    return (ie.lower(), str(vid)) if ie and vid else None
+
+
+# ── Metadata cache ────────────────────────────────────────────────────────────
+
+_HEAVY_KEYS = ("automatic_captions", "subtitles", "requested_subtitles", "heatmap",
+               "comments", "requested_formats", "requested_downloads")
+_EXPIRY_RE  = re.compile(r"[?&/](?:expire|expires|exp)[=/](\d{9,11})", re.I)
+_SIGNED_RE  = re.compile(r"[?&](?:signature|sig|token|policy|key-pair-id)=", re.I)
+
+def _compact_info(info):
+    # JSON-safe copy without captions and other bulk yt-dlp does not need to download.
+    # Selection results are dropped too; yt-dlp redoes them for the chosen format.
+    if yt_dlp is not None:
+        info = yt_dlp.YoutubeDL.sanitize_info(info)
+    return {k: v for k, v in info.items() if k not in _HEAVY_KEYS and not k.startswith("__")}
+
+def _stream_urls(info):
+    for f in info.get("formats") or []:
+        for k in ("url", "manifest_url"):
+            if f.get(k): yield f[k]
+
+def _signed_expiry(info):
+    stamps = [int(m.group(1)) for u in _stream_urls(info) for m in [_EXPIRY_RE.search(u)] if m]
+    return min(stamps) if stamps else None
+
+def _info_ttl(info):
+    expiry = _signed_expiry(info)
+    if expiry:
+        return max(0, min(META_CACHE_TTL, expiry - time.time() - META_EXPIRY_MARGIN))
+    if any(_SIGNED_RE.search(u) for u in _stream_urls(info)):
+        return META_SIGNED_TTL
+    return META_CACHE_TTL
+
+class MetadataCache:
+    def __init__(self, path=META_CACHE_FILE, max_bytes=META_CACHE_BYTES):
+        self.path      = path
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self._lock     = threading.Lock()
+        self._db       = None
+
+    def _conn(self):
+        if self._db is None:
+            import sqlite3
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, "
+                             "payload TEXT, size INTEGER, stored REAL, expires REAL, "
+                             "used REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS meta_used ON meta (used)")
+        return self._db
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            try:
+                db  = self._conn()
+                row = db.execute("SELECT payload, expires FROM meta WHERE key = ?",
+                                 (key,)).fetchone()
+                if row and row[1] > now:
+                    db.execute("UPDATE meta SET used = ? WHERE key = ?", (now, key))
+                    db.commit()
+                    self.hits += 1
+                    return json.loads(row[0])
+                if row:
+                    db.execute("DELETE FROM meta WHERE key = ?", (key,))
+                    db.commit()
+            except Exception:
+                pass
+            self.misses += 1
+            return None
+
+    def put(self, key, info):
+        # info must already be JSON-safe (see _compact_info); returns whether it was stored
+        ttl = _info_ttl(info)
+        if ttl <= 0: return False
+        now     = time.time()
+        payload = json.dumps(info, ensure_ascii=False, default=str)
+        if len(payload) > INFO_MAX_BYTES: return False
+        with self._lock:
+            try:
+                db = self._conn()
+                db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?, ?, ?)",
+                           (key, payload, len(payload), now, now + ttl, now))
+                self._evict(db, now)
+                db.commit()
+                return True
+            except Exception:
+                return False
+
+    def _evict(self, db, now):
+        db.execute("DELETE FROM meta WHERE expires <= ?", (now,))
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM meta").fetchone()[0]
+        if total <= self.max_bytes: return
+        # Least recently used entries go first until the cache fits again
+        for key, size in db.execute("SELECT key, size FROM meta ORDER BY used").fetchall():
+            db.execute("DELETE FROM meta WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes: break
+
+    def clear(self):
+        with self._lock:
+            try:
+                self._conn().execute("DELETE FROM meta")
+                self._db.commit()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._lock:
+            try:
+                n, size = self._conn().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM meta").fetchone()
+            except Exception:
+                n, size = 0, 0
+            return {"hits": self.hits, "misses": self.misses, "entries": n, "bytes": size}
+
+META_CACHE = MetadataCache()
+
+
+# ── Download archive ──────────────────────────────────────────────────────────
+
+def _file_sha256(path):
+    import hashlib
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(DL_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class DownloadArchive:
+    # What has already been downloaded, keyed by extractor and video id per output mode.
+    # An entry only counts while its file is still on disk with the recorded size.
+    def __init__(self, path=ARCHIVE_FILE):
+        self.path   = path
+        self.hits   = 0
+        self._lock  = threading.Lock()
+        self._db    = None
+
+    def _conn(self):
+        if self._db is None:
+            import sqlite3
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS items (extractor TEXT, video_id TEXT, "
+                             "mode TEXT, path TEXT, size INTEGER, sha256 TEXT, added REAL, "
+                             "PRIMARY KEY (extractor, video_id, mode))")
+        return self._db
+
+    def lookup(self, key, mode):
+        if not key: return None
+        with self._lock:
+            try:
+                row = self._conn().execute(
+                    "SELECT path, size FROM items WHERE extractor = ? AND video_id = ? "
+                    "AND mode = ?", (*key, mode)).fetchone()
+            except Exception:
+                return None
+        if not row: return None
+        try:
+            if os.path.getsize(row[0]) != row[1]: return None
+        except OSError:
+            return None
+        self.hits += 1
+        return row[0]
+
+    def record(self, key, mode, path):
+        if not key or not path: return
+        try:
+            size, digest = os.path.getsize(path), _file_sha256(path)
+        except OSError:
+            return
+        with self._lock:
+            try:
+                self._conn().execute("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     (*key, mode, path, size, digest, time.time()))
+                self._db.commit()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._lock:
+            try:
+                n = self._conn().execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            except Exception:
+                n = 0
+            return {"entries": n, "hits": self.hits}
+
+ARCHIVE = DownloadArchive()
+
+
+# ── Job journal ───────────────────────────────────────────────────────────────
+
+def _pid_alive(pid):
+    if pid == os.getpid(): return True
+    if sys.platform == "win32":
+        import ctypes
+        k32 = ctypes.windll.kernel32
+        h = k32.OpenProcess(0x1000, False, pid)   # PROCESS_QUERY_LIMITED_INFORMATION
+        if not h: return False
+        code = ctypes.c_ulong()
+        ok = k32.GetExitCodeProcess(h, ctypes.byref(code))
+        k32.CloseHandle(h)
+        return bool(ok) and code.value == 259      # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class JobJournal:
+    # Write-ahead record of unfinished jobs. A row is written when a job is queued, kept up
+    # to date while it runs and deleted once it finishes. Rows whose process is gone are
+    # queued again on the next start, and yt-dlp continues from the .part files.
+    def __init__(self, path=JOURNAL_FILE):
+        self.path    = path
+        self.enabled = True
+        self._lock   = threading.Lock()
+        self._db     = None
+        self._last   = {}    # row id -> (state, time of last write)
+
+    def _conn(self):
+        if self._db is None:
+            import sqlite3
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, owner INTEGER, "
+                             "url TEXT, mode TEXT, fid TEXT, bitrate TEXT, out TEXT, priority INTEGER, "
+                             "title TEXT, state TEXT, downloaded INTEGER, total INTEGER, "
+                             "added REAL, updated REAL)")
+        return self._db
+
+    def add(self, job):
+        if not self.enabled or job.jid: return
+        with self._lock:
+            try:
+                job.jid = self._conn().execute(
+                    "INSERT INTO jobs VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0, ?, ?)",
+                    (os.getpid(), job.url, job.mode, job.fid, job.bitrate, job.out, job.priority,
+                     job.title, job.state, time.time(), time.time())).lastrowid
+            except Exception:
+                pass
+
+    def update(self, job):
+        if not self.enabled or not job.jid: return
+        now = time.monotonic()
+        with self._lock:
+            state, last = self._last.get(job.jid, (None, 0.0))
+            try:
+                if job.finished:
+                    self._last.pop(job.jid, None)
+                    self._conn().execute("DELETE FROM jobs WHERE id = ?", (job.jid,))
+                elif state != job.state or now - last >= JOURNAL_INTERVAL:
+                    self._last[job.jid] = (job.state, now)
+                    p = job.progress
+                    self._conn().execute(
+                        "UPDATE jobs SET title = ?, state = ?, downloaded = ?, total = ?, updated = ? "
+                        "WHERE id = ?", (job.title, job.state, p.get("downloaded", 0),
+                                         p.get("total", 0), time.time(), job.jid))
+            except Exception:
+                pass
+
+    def suspend(self):
+        # On shutdown: jobs cancelled from here on keep their rows and come back next time
+        self.enabled = False
+
+    def resume(self):
+        # Claims the rows of processes that are gone and returns them as fresh jobs
+        with self._lock:
+            try:
+                db = self._conn()
+                db.execute("BEGIN IMMEDIATE")   # two instances starting together claim disjoint rows
+                try:
+                    rows = [r for r in db.execute("SELECT id, owner, url, mode, fid, bitrate, out, "
+                                                  "priority, title FROM jobs ORDER BY id")
+                            if not _pid_alive(r[1])]
+                    db.executemany("UPDATE jobs SET owner = ? WHERE id = ?",
+                                   [(os.getpid(), r[0]) for r in rows])
+                    db.execute("COMMIT")
+                except Exception:
+                    db.execute("ROLLBACK")
+                    raise
+            except Exception:
+                return []
+        jobs = []
+        for jid, _, url, mode, fid, bitrate, out, priority, title in rows:
+            job = Job(url, mode, fid=fid, bitrate=bitrate, out=out, priority=priority, title=title)
+            job.jid, job.resumed = jid, True
+            jobs.append(job)
+        return jobs
+
+    def stats(self):
+        with self._lock:
+            try:
+                n = self._conn().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            except Exception:
+                n = 0
+            return {"unfinished": n}
+
+JOURNAL = JobJournal()
+
+
+# ── Artwork cache ─────────────────────────────────────────────────────────────
+
+class ArtworkCache:
+    # Cover art converted to JPEG once and stored under the hash of the original image.
+    # Thumbnail URLs map onto those files, so tracks sharing an album cover skip both the
+    # request and the conversion; a new URL serving known bytes still skips the conversion.
+    def __init__(self, root=ART_CACHE_DIR, max_bytes=ART_CACHE_BYTES):
+        self.root      = root
+        self.max_bytes = max_bytes
+        self.url_hits  = 0
+        self.hash_hits = 0
+        self.misses    = 0
+        self._lock     = threading.Lock()
+        self._db       = None
+
+    def _conn(self):
+        if self._db is None:
+            import sqlite3
+            os.makedirs(self.root, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(self.root, "index.db"), check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, sha TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS art (sha TEXT PRIMARY KEY, "
+                             "size INTEGER, used REAL)")
+        return self._db
+
+    def _path(self, sha):
+        return os.path.join(self.root, sha + ".jpg")
+
+    def _known(self, db, sha):
+        # A cached file that was deleted behind our back is simply forgotten
+        if sha and os.path.isfile(self._path(sha)):
+            db.execute("UPDATE art SET used = ? WHERE sha = ?", (time.time(), sha))
+            db.commit()
+            return self._path(sha)
+        if sha:
+            db.execute("DELETE FROM art WHERE sha = ?", (sha,))
+            db.execute("DELETE FROM urls WHERE sha = ?", (sha,))
+            db.commit()
+        return None
+
+    def get(self, url):
+        # Path of the cached JPEG for url, fetching and converting it on a miss
+        import hashlib
+        with self._lock:
+            db  = self._conn()
+            row = db.execute("SELECT sha FROM urls WHERE url = ?", (url,)).fetchone()
+            path = self._known(db, row and row[0])
+            if path:
+                self.url_hits += 1
+                return path, "url"
+        with _urlopen(_request(url), 15) as r:
+            raw = r.read()
+        sha = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            db   = self._conn()
+            path = self._known(db, sha) if db.execute(
+                "SELECT 1 FROM art WHERE sha = ?", (sha,)).fetchone() else None
+            if path:
+                db.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, sha))
+                db.commit()
+                self.hash_hits += 1
+                return path, "hash"
+        path = self._path(sha)
+        self._convert(raw, path)
+        with self._lock:
+            db = self._conn()
+            db.execute("INSERT OR REPLACE INTO art VALUES (?, ?, ?)",
+                       (sha, os.path.getsize(path), time.time()))
+            db.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, sha))
+            self._evict(db)
+            db.commit()
+            self.misses += 1
+        return path, "fetched"
+
+    def _convert(self, raw, dest):
+        part = f"{dest}.{threading.get_ident()}.part"   # concurrent misses on one image
+        if raw[:3] == b"\xff\xd8\xff":   # already a JPEG
+            with open(part, "wb") as f: f.write(raw)
+        else:
+            import subprocess
+            src = part + ".src"
+            with open(src, "wb") as f: f.write(raw)
+            try:
+                subprocess.run([FFMPEG_PATH, "-y", "-v", "error", "-i", src, "-frames:v", "1",
+                                "-q:v", "2", "-f", "mjpeg", part], check=True,
+                               stdin=subprocess.DEVNULL, capture_output=True,
+                               creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+            finally:
+                os.remove(src)
+        os.replace(part, dest)
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM art").fetchone()[0]
+        for sha, size in db.execute("SELECT sha, size FROM art ORDER BY used").fetchall():
+            if total <= self.max_bytes: break
+            db.execute("DELETE FROM art WHERE sha = ?", (sha,))
+            db.execute("DELETE FROM urls WHERE sha = ?", (sha,))
+            try: os.remove(self._path(sha))
+            except OSError: pass
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            try:
+                n, size = self._conn().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM art").fetchone()
+            except Exception:
+                n, size = 0, 0
+            return {"url_hits": self.url_hits, "hash_hits": self.hash_hits,
+                    "misses": self.misses, "entries": n, "bytes": size}
+
+ARTWORK = ArtworkCache()
+
+
+# ── yt-dlp instance pool ──────────────────────────────────────────────────────
+
+_HOOK_OPTS = ("progress_hooks", "postprocessor_hooks", "post_hooks", "match_filter")
+
+class YDLPool:
+    # Keeps initialised YoutubeDL instances around between jobs. Instances are keyed by
+    # profile plus their options (the format selector is compiled at construction), share
+    # one cookie jar, and are leased to a single thread at a time. Per-job hooks are
+    # routed through each instance's slot so the same instance can serve any job.
+
+    def __init__(self, max_idle=YDL_POOL_IDLE):
+        self.max_idle  = max_idle
+        self.created   = 0
+        self.reused    = 0
+        self.init_time = 0.0     # seconds spent constructing instances
+        self._lock     = threading.Lock()
+        self._idle     = {}      # key -> [instances], insertion order is LRU order
+        self._cookies  = None
+
+    @staticmethod
+    def _key(profile, opts):
+        rest = {k: v for k, v in opts.items() if k not in _HOOK_OPTS}
+        return profile + ":" + json.dumps(rest, sort_keys=True, default=repr)
+
+    def _create(self, opts):
+        slot = {k: () for k in _HOOK_OPTS}
+        base = dict(opts)
+        base["progress_hooks"]      = [lambda d: [h(d) for h in slot["progress_hooks"]]]
+        base["postprocessor_hooks"] = [lambda d: [h(d) for h in slot["postprocessor_hooks"]]]
+        base["post_hooks"]          = [lambda fn: [h(fn) for h in slot["post_hooks"]]]
+        base["match_filter"]        = lambda info, incomplete=False: next(
+            (r for f in slot["match_filter"] for r in [f(info, incomplete)] if r), None)
+        t0  = time.perf_counter()
+        ydl = yt_dlp.YoutubeDL(base)
+        with self._lock:
+            self.created   += 1
+            self.init_time += time.perf_counter() - t0
+            if self._cookies is None:
+                self._cookies = ydl.cookiejar
+            elif "cookiejar" not in vars(ydl):
+                vars(ydl)["cookiejar"] = self._cookies   # before the request director exists
+        ydl._aurora_slot = slot
+        return ydl
+
+    @contextlib.contextmanager
+    def lease(self, profile, opts):
+        key = self._key(profile, opts)
+        with self._lock:
+            ydl = self._idle.get(key, []).pop() if self._idle.get(key) else None
+            if ydl is not None:
+                self.reused += 1
+        if ydl is None:
+            ydl = self._create(opts)
+        slot = ydl._aurora_slot
+        for k in _HOOK_OPTS:
+            v = opts.get(k) or ()
+            slot[k] = tuple(v) if isinstance(v, (list, tuple)) else (v,)
+        ok = False
+        try:
+            yield ydl
+            ok = True
+        finally:
+            for k in _HOOK_OPTS:
+                slot[k] = ()
+            if ok: self._release(key, ydl)
+            else:  self._close(ydl)   # state after an error is not worth trusting
+
+    def _release(self, key, ydl):
+        with self._lock:
+            idle = self._idle.pop(key, [])
+            idle.append(ydl)
+            self._idle[key] = idle
+            evict = []
+            while sum(len(v) for v in self._idle.values()) > self.max_idle:
+                old = next(iter(self._idle))
+                evict.append(self._idle[old].pop(0))
+                if not self._idle[old]: del self._idle[old]
+        for old in evict:
+            self._close(old)
+
+    @staticmethod
+    def _close(ydl):
+        try:
+            ydl.close() if hasattr(ydl, "close") else ydl.__exit__(None, None, None)
+        except Exception:
+            pass
+
+    def warm(self, profile, opts):
+        with self.lease(profile, opts):
+            pass
+
+    def stats(self):
+        with self._lock:
+            avg = self.init_time / self.created if self.created else 0.0
+            return {"created": self.created, "reused": self.reused,
+                    "idle": sum(len(v) for v in self._idle.values()),
+                    "avg_init_ms": round(avg * 1000, 1),
+                    "saved_ms": round(avg * self.reused * 1000, 1)}
+
+YDL_POOL = YDLPool()
+
+INFO_OPTS = {"quiet": True, "no_warnings": True, "skip_download": True}
+FLAT_OPTS = {"quiet": True, "no_warnings": True, "extract_flat": "in_playlist",
+             "lazy_playlist": True}
+
+
+# ── Extraction workers ────────────────────────────────────────────────────────
+
+class ExtractorBusy(Exception):
+    pass
+
+class LookupCancelled(Exception):
+    pass
+
+def _extract_task(kind, url):
+    if kind == "playlist":
+        return playlist_info(url)
+    with YDL_POOL.lease("info", INFO_OPTS) as ydl:
+        info = ydl.extract_info(url, download=False)
+    return _compact_info(info) if info else None
+
+def _extract_worker(conn):
+    # Runs in a child process: one warm YoutubeDL answering lookups until the pipe closes
+    _import_yt_dlp()
+    if yt_dlp is not None:
+        YDL_POOL.warm("info", INFO_OPTS)
+    while True:
+        try:
+            kind, url = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send(("ok", _extract_task(kind, url)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+class ExtractorPool:
+    # Lookups run in worker processes so a timeout really stops the extraction, sockets
+    # and all, instead of leaving a thread behind. At most `size` run at once; up to
+    # `backlog` callers wait in line, later ones are refused with ExtractorBusy.
+    def __init__(self, size=EXTRACT_WORKERS, backlog=EXTRACT_BACKLOG):
+        self.size      = max(1, int(size))
+        self.backlog   = backlog
+        self.waiting   = 0
+        self.spawned   = 0
+        self.killed    = 0
+        self.completed = 0
+        self.inline    = False   # processes could not be started; lookups run in this one
+        self._cv       = threading.Condition()
+        self._idle     = []      # (process, connection) ready for work
+        self._busy     = 0
+
+    def _spawn(self):
+        import multiprocessing
+        ctx = multiprocessing.get_context("spawn")   # fork would copy Tk and running threads
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_extract_worker, args=(child,), daemon=True,
+                           name=f"{APP_NAME}-extract")
+        proc.start()
+        child.close()
+        with self._cv: self.spawned += 1
+        return proc, parent
+
+    def _kill(self, worker):
+        proc, conn = worker
+        conn.close()
+        proc.kill()
+        proc.join(1)
+        with self._cv: self.killed += 1
+
+    def start(self):
+        # Starts the workers ahead of the first lookup, which would otherwise wait for an import
+        with self._cv:
+            n = self.size - len(self._idle) - self._busy
+        try:
+            workers = [self._spawn() for _ in range(n)]
+        except Exception:
+            self.inline = True
+            return
+        with self._cv:
+            self._idle.extend(workers)
+
+    def extract(self, kind, url, timeout=FETCH_TIMEOUT, cancel=None):
+        # kind is "info" (compact info dict) or "playlist" (title and count). Setting the
+        # cancel event stops the lookup the same way a timeout does.
+        deadline = time.monotonic() + timeout
+        cancel   = cancel or threading.Event()
+        with self._cv:
+            if self._busy >= self.size and self.waiting >= self.backlog:
+                raise ExtractorBusy(f"{self.waiting} lookups are already waiting.")
+            self.waiting += 1
+            try:
+                while self._busy >= self.size:
+                    left = deadline - time.monotonic()
+                    if cancel.is_set(): raise LookupCancelled(url)
+                    if left <= 0: raise TimeoutError(f"Lookup timed out after {timeout}s.")
+                    self._cv.wait(min(left, 0.25))
+            finally:
+                self.waiting -= 1
+            self._busy += 1
+            worker = self._idle.pop() if self._idle else None
+        try:
+            if self.inline:
+                return _extract_task(kind, url)
+            if worker is None or not worker[0].is_alive():
+                worker = self._spawn()
+            proc, conn = worker
+            conn.send((kind, url))
+            while not conn.poll(0.25):
+                if not proc.is_alive():
+                    raise OSError("The lookup process exited unexpectedly.")
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Lookup timed out after {timeout}s.")
+                if cancel.is_set():
+                    raise LookupCancelled(url)
+            status, result = conn.recv()
+        except (TimeoutError, LookupCancelled, OSError, EOFError):
+            if worker is not None:
+                self._kill(worker)
+                try:
+                    worker = self._spawn()   # the replacement warms up while nobody waits
+                except Exception:
+                    worker = None
+            raise
+        finally:
+            with self._cv:
+                self._busy -= 1
+                self.completed += 1
+                if worker is not None: self._idle.append(worker)
+                self._cv.notify()
+        if status == "error":
+            raise RuntimeError(result)
+        return result
+
+    def stats(self):
+        with self._cv:
+            return {"workers": self.size, "busy": self._busy, "waiting": self.waiting,
+                    "idle": len(self._idle), "spawned": self.spawned, "killed": self.killed,
+                    "completed": self.completed, "inline": self.inline}
+
+EXTRACTORS = ExtractorPool()
+
+
+# ── Bandwidth ─────────────────────────────────────────────────────────────────
+
+_RATE_RE   = re.compile(r"(\d+(?:\.\d+)?)\s*([kmg]?)i?b?(?:/s)?", re.I)
+_WINDOW_RE = re.compile(r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(.+)")
+
+def parse_rate(text):
+    # "500K", "2M", "1.5MB/s" -> bytes per second; empty or 0 means unlimited
+    text = str(text or "").strip()
+    if not text: return 0
+    m = _RATE_RE.fullmatch(text)
+    if not m: raise ValueError(f"Invalid rate: {text}")
+    return int(float(m.group(1)) * 1024 ** " kmg".index((m.group(2) or " ").lower()))
+
+def parse_window(text):
+    # "09:00-18:00=2M" -> (start minute, end minute, rate); windows may wrap past midnight
+    m = _WINDOW_RE.fullmatch(str(text).strip())
+    if not m: raise ValueError(f"Invalid time window: {text}")
+    h1, m1, h2, m2 = map(int, m.groups()[:4])
+    return (h1 * 60 + m1) % 1440, (h2 * 60 + m2) % 1440, parse_rate(m.group(5))
+
+class Bandwidth:
+    # One token bucket shared by every download in the process. Progress hooks charge it
+    # for the bytes they have just received; each charge books the next slice of a single
+    # clock, so waiting jobs take turns in arrival order and none of them is starved.
+    def __init__(self, rate=0, windows=()):
+        self.rate    = 0
+        self.windows = []
+        self._lock   = threading.Lock()
+        self._next   = time.monotonic()
+        self._seen   = collections.deque()   # (time, bytes) behind the effective rate
+        self._total  = 0
+        self.configure(rate, windows)
+
+    def configure(self, rate=None, windows=None):
+        if rate is not None:    self.rate    = max(0, int(rate))
+        if windows is not None: self.windows = list(windows)
+
+    def limit(self):
+        # First time window that covers the current local time, else the base rate
+        t = time.localtime()
+        minute = t.tm_hour * 60 + t.tm_min
+        for start, end, rate in self.windows:
+            if (start <= minute < end) if start <= end else (minute >= start or minute < end):
+                return rate
+        return self.rate
+
+    def consume(self, n, abort=None):
+        if n <= 0: return
+        rate = self.limit()
+        now  = time.monotonic()
+        with self._lock:
+            self._seen.append((now, n))
+            self._total += n
+            while self._seen[0][0] < now - BW_AVG_WINDOW:
+                self._total -= self._seen.popleft()[1]
+            if not rate:
+                self._next = now
+                return
+            self._next = max(self._next, now - BW_BURST) + n / rate
+            until = self._next
+        while not (abort and abort.is_set()):
+            left = until - time.monotonic()
+            if left <= 0: break
+            time.sleep(min(left, 0.25))
+
+    def effective(self):
+        with self._lock:
+            while self._seen and self._seen[0][0] < time.monotonic() - BW_AVG_WINDOW:
+                self._total -= self._seen.popleft()[1]
+            return self._total / BW_AVG_WINDOW
+
+    def stats(self):
+        return {"limit": self.limit(), "effective": round(self.effective())}
+
+BANDWIDTH = Bandwidth()
+
+def _bandwidth_settings(settings):
+    try:
+        return (parse_rate(settings.get("rate_limit")),
+                [parse_window(w) for w in settings.get("rate_windows") or ()])
+    except ValueError:
+        return 0, []
+
+
+# ── Disk space ────────────────────────────────────────────────────────────────
+
+def _disk_of(path):
+    # (device, nearest existing directory); the output folder may not exist yet
+    path = os.path.abspath(path)
+    while not os.path.isdir(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return os.stat(path).st_dev, path
+
+def expected_size(info):
+    # Bytes the selected formats will take, from filesize, filesize_approx or bitrate × duration
+    total = 0
+    for f in info.get("requested_formats") or [info]:
+        n = f.get("filesize") or f.get("filesize_approx")
+        if not n and f.get("tbr") and info.get("duration"):
+            n = f["tbr"] * 125 * info["duration"]   # kbit/s -> bytes
+        if not n: return None
+        total += n
+    return int(total)
+
+class DiskSpace:
+    # Space promised to running jobs per filesystem. Before its download starts a job
+    # reserves what it will write; if that doesn't fit beside the other reservations it
+    # waits for them to finish, and if it couldn't fit even alone it fails right away
+    # instead of after a long download. Reservations are not reduced as files grow, so
+    # admission errs on the safe side.
+    def __init__(self, staging=None):
+        self.staging   = staging   # fast local folder for .part files and ffmpeg, or None
+        self.refused   = 0
+        self.waited    = 0
+        self._cv       = threading.Condition()
+        self._reserved = {}        # device -> bytes
+        self._jobs     = {}        # job id -> [(device, bytes)]
+
+    def needs(self, job, size, merged):
+        # ffmpeg keeps its input until the output is written, so merges and MP3 need twice
+        work = size * (2 if merged or job.mode == "mp3" else 1)
+        return {self.staging: work, job.out: size} if self.staging else {job.out: work}
+
+    def reserve(self, job, needs, on_wait=None):
+        disks = {}
+        for path, n in needs.items():
+            dev, where = _disk_of(path)
+            disks.setdefault(dev, [where, 0])[1] += n
+        with self._cv:
+            # A retried download runs the before_dl hook again; replace the job's hold
+            # rather than stacking a second one it would then wait on
+            for dev, n in self._jobs.pop(job.id, ()):
+                self._reserved[dev] -= n
+            waiting = False
+            while True:
+                short = None
+                for dev, (where, n) in disks.items():
+                    free = shutil.disk_usage(where).free - DISK_MARGIN
+                    if n > free - self._reserved.get(dev, 0):
+                        short = dev, where, n, free
+                        break
+                if short is None: break
+                dev, where, n, free = short
+                if not self._reserved.get(dev):   # nothing running will free space here
+                    self.refused += 1
+                    raise OSError(f"Not enough disk space in {where}: {n / 1_048_576:.0f} MB "
+                                  f"needed, {max(0, free) / 1_048_576:.0f} MB free.")
+                if job.abort.is_set():
+                    raise JobAborted("Download aborted by user.")
+                if not waiting:
+                    waiting = True
+                    self.waited += 1
+                    if on_wait: on_wait(n)
+                self._cv.wait(1.0)   # free space is polled too, other programs may free some
+            held = self._jobs.setdefault(job.id, [])
+            for dev, (_, n) in disks.items():
+                self._reserved[dev] = self._reserved.get(dev, 0) + n
+                held.append((dev, n))
+
+    def release(self, job):
+        with self._cv:
+            for dev, n in self._jobs.pop(job.id, ()):
+                self._reserved[dev] -= n
+            self._cv.notify_all()
+
+    def stats(self):
+        with self._cv:
+            return {"staging": self.staging, "reserved": sum(self._reserved.values()),
+                    "waited": self.waited, "refused": self.refused}
+
+DISK = DiskSpace()
+
+
+# ── Fragment tuning ───────────────────────────────────────────────────────────
+
+_THROTTLE_RE = re.compile(r"HTTP Error (?:403|429)|Too Many Requests", re.I)
+_STALE_RE    = re.compile(r"HTTP Error (?:403|410)|\bexpired\b", re.I)
+
+class FragmentTuner:
+    # Per-site concurrent_fragment_downloads and http_chunk_size. Every finished job reports
+    # its time to first byte (about one round trip) and throughput. Concurrency keeps
+    # growing while that pays off, faster on high-latency links, and is halved when the
+    # site answers 403/429 or throughput collapses. Chunks are sized from the throughput.
+    def __init__(self, fixed=0):
+        self.fixed  = fixed    # fragment count set by the user; 0 tunes it
+        self._lock  = threading.Lock()
+        self._hosts = {}
+
+    def settings(self, host):
+        with self._lock:
+            st = self._hosts.get(host) or {}
+            return self.fixed or st.get("conc", FRAG_START), st.get("chunk")
+
+    def observe(self, job):
+        m = job.marks
+        with self._lock:
+            st = self._hosts.setdefault(job.host, {"conc": FRAG_START})
+            if job.state == JOB_FAILED and _THROTTLE_RE.search(job.error or ""):
+                st["conc"]  = max(1, st["conc"] // 2)
+                st["chunk"] = max(CHUNK_MIN, (st.get("chunk") or CHUNK_MAX) // 2)
+                st["throttled"] = st.get("throttled", 0) + 1
+                st.pop("bps", None)   # measure again from the lower level
+                return
+            if job.state != JOB_DONE or "first_byte" not in m or "download_end" not in m:
+                return
+            secs = m["download_end"] - m["first_byte"]
+            if secs <= 0 or job.received < CHUNK_MIN:
+                return   # too small to say anything
+            bps, rtt = job.received / secs, m["first_byte"] - m.get("extract_end", m["first_byte"])
+            st["rtt"]   = rtt if "rtt" not in st else 0.7 * st["rtt"] + 0.3 * rtt
+            st["chunk"] = min(CHUNK_MAX, max(CHUNK_MIN, int(bps * CHUNK_SECONDS) // CHUNK_MIN * CHUNK_MIN))
+            used, prev  = job.progress.get("fragments") or st["conc"], st.get("bps")
+            st["bps"]   = bps
+            if not job.progress.get("fragmented"):
+                return
+            if prev is None or bps > prev * 1.1:   # still scaling
+                st["conc"] = min(FRAG_MAX, used + (2 if st["rtt"] > 0.15 else 1))
+            elif bps < prev * 0.5:                 # collapsed: most likely throttled
+                st["conc"] = max(1, used // 2)
+            elif bps < prev * 0.9:                 # the last step made it worse
+                st["conc"] = max(1, used - 1)
+
+    def stats(self):
+        with self._lock:
+            return {h: {k: round(v, 3) if isinstance(v, float) else v for k, v in st.items()}
+                    for h, st in self._hosts.items()}
+
+TUNER = FragmentTuner()
+
+
+# ── Telemetry ─────────────────────────────────────────────────────────────────
+
+PHASES = {   # phase -> (from mark, to mark)
+    "queue_wait":  ("queued", "extract_start"),
+    "extract":     ("extract_start", "extract_end"),
+    "ttfb":        ("extract_end", "first_byte"),
+    "download":    ("extract_end", "download_end"),
+    "postprocess": ("download_end", "finished"),
+    "total":       ("extract_start", "finished"),
+}
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[max(0, -(-len(values) * p // 100) - 1)] if values else None
+
+class Telemetry:
+    # One JSON line per finished job with its phase timestamps, appended to a log that
+    # rotates by size. Optionally keeps a Prometheus text file for node_exporter.
+    def __init__(self, path=TELEMETRY_FILE, max_bytes=TELEMETRY_BYTES, keep=TELEMETRY_KEEP):
+        self.path      = path
+        self.max_bytes = max_bytes
+        self.keep      = keep
+        self.textfile  = None
+        self._lock     = threading.Lock()
+        self._jobs     = collections.Counter()   # final state -> jobs, for the text file
+        self._bytes    = 0
+        self._phases   = {}                      # phase -> [sum, count]
+
+    def entry(self, job):
+        m = job.marks
+        phases = {k: round(m[b] - m[a], 3) for k, (a, b) in PHASES.items() if a in m and b in m}
+        dl = phases.get("download", 0) - phases.get("ttfb", 0)
+        return {"id": job.id, "url": job.url, "host": job.host, "mode": job.archive_mode,
+                "state": job.state, "error": job.error, "bytes": job.received,
+                "avg_bps": round(job.received / dl) if dl > 0 else None,
+                "peak_bps": round(job.peak_speed) or None, "phases": phases,
+                "marks": {k: round(v, 3) for k, v in m.items()},
+                "postprocessors": [{"name": n, "start": round(a, 3),
+                                    "end": round(b, 3) if b else None}
+                                   for n, a, b in job.pp_runs]}
+
+    def record(self, job):
+        entry = self.entry(job)
+        line  = json.dumps({"time": round(time.time(), 3), **entry}, ensure_ascii=False)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError:
+                pass
+            self._jobs[entry["state"]] += 1
+            self._bytes += entry["bytes"]
+            for k, v in entry["phases"].items():
+                agg = self._phases.setdefault(k, [0.0, 0])
+                agg[0] += v; agg[1] += 1
+            if self.textfile: self._write_textfile()
+
+    def _rotate(self):
+        for i in range(self.keep, 0, -1):
+            src = self.path if i == 1 else f"{self.path}.{i - 1}"
+            if os.path.exists(src): os.replace(src, f"{self.path}.{i}")
+
+    def _write_textfile(self):
+        lines = ["# HELP aurorafetch_jobs_total Jobs finished since start, by final state.",
+                 "# TYPE aurorafetch_jobs_total counter"]
+        lines += [f'aurorafetch_jobs_total{{state="{k}"}} {v}' for k, v in sorted(self._jobs.items())]
+        lines += ["# HELP aurorafetch_downloaded_bytes_total Bytes received by finished jobs.",
+                  "# TYPE aurorafetch_downloaded_bytes_total counter",
+                  f"aurorafetch_downloaded_bytes_total {self._bytes}",
+                  "# HELP aurorafetch_phase_seconds Time spent per job phase.",
+                  "# TYPE aurorafetch_phase_seconds summary"]
+        for k, (total, n) in sorted(self._phases.items()):
+            lines += [f'aurorafetch_phase_seconds_sum{{phase="{k}"}} {total:.3f}',
+                      f'aurorafetch_phase_seconds_count{{phase="{k}"}} {n}']
+        try:   # written aside and swapped in so the collector never reads half a file
+            with open(self.textfile + ".tmp", "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(self.textfile + ".tmp", self.textfile)
+        except OSError:
+            pass
+
+    def entries(self):
+        for path in [f"{self.path}.{i}" for i in range(self.keep, 0, -1)] + [self.path]:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        try: yield json.loads(line)
+                        except ValueError: pass
+            except OSError:
+                pass
+
+    def summary(self):
+        values, states = {}, collections.Counter()
+        for e in self.entries():
+            states[e.get("state")] += 1
+            for k, v in (e.get("phases") or {}).items():
+                values.setdefault(k, []).append(v)
+            for k in ("avg_bps", "peak_bps"):
+                if e.get(k): values.setdefault(k, []).append(e[k])
+        return {"jobs": sum(states.values()), "states": dict(states),
+                **{k: {"n": len(v), "p50": _percentile(v, 50), "p95": _percentile(v, 95)}
+                   for k, v in values.items()}}
+
+TELEMETRY = Telemetry()
+
+
+# ── Download jobs ─────────────────────────────────────────────────────────────
+
+JOB_QUEUED      = "queued"
+JOB_EXTRACTING  = "extracting"
+JOB_DOWNLOADING = "downloading"
+JOB_POSTPROC    = "post-processing"
+JOB_DONE        = "done"
+JOB_FAILED      = "failed"
+JOB_ABORTED     = "aborted"
+JOB_SKIPPED     = "skipped"
+JOB_FINISHED    = (JOB_DONE, JOB_FAILED, JOB_ABORTED, JOB_SKIPPED)
+
+MP3_BITRATES    = ["320", "256", "192", "128", "96"]
+MERGE_COPY      = ("mp4a", "aac", "m4a")   # audio that goes into MP4 untouched
+BEFORE_DL_PPS   = ("MergePlan", "Artwork", "DiskSpace")   # our own postprocessors that run before download
+MERGE_ARGS      = {"copy": ["-c:v","copy","-c:a","copy"],
+                   "aac":  ["-c:v","copy","-c:a","aac","-b:a","192k"]}
+
+class JobAborted(Exception):
+    pass
+
+class Job:
+    _ids = itertools.count(1)
+
+    def __init__(self, url, mode="video", fid="best", bitrate="320", out=None, priority=0,
+                 title=None, info=None, key=None):
+        self.id       = next(Job._ids)
+        self.url      = clean_url(url)
+        self.mode     = mode
+        self.fid      = fid
+        self.bitrate  = bitrate
+        self.out      = out or os.path.expanduser("~/Downloads")
+        self.priority = priority
+        self.host     = _job_host(self.url)
+        self.state    = JOB_QUEUED
+        self.title    = title
+        self.error    = None
+        self.progress = {}
+        self.abort    = threading.Event()
+        self.listener = None
+        self.handoff  = None     # set by the queue; called once the download part is over
+        self.marks    = {"queued": time.time()}   # phase name -> timestamp, see PHASES
+        self.pp_runs  = []       # [postprocessor, start, end]
+        self.received = 0
+        self.peak_speed = 0
+        self.info     = info     # already-extracted info dict to download from, if still fresh
+        self.key      = key or url_key(self.url) or info_key(info)   # (extractor, id) if known
+        self.filepath = None
+        self.jid      = None     # row in the job journal
+        self.resumed  = False    # requeued from the journal after a restart
+
+    @property
+    def label(self):
+        return "MP3" if self.mode == "mp3" else "Video"
+
+    @property
+    def archive_mode(self):
+        return f"mp3:{self.bitrate}" if self.mode == "mp3" else f"video:{self.fid}"
+
+    @property
+    def finished(self):
+        return self.state in JOB_FINISHED
+
+    def mark(self, name, once=True):
+        if not (once and name in self.marks): self.marks[name] = time.time()
+
+    def update(self, state=None, **progress):
+        if state: self.state = state
+        if progress: self.progress.update(progress)
+        if self.listener: self.listener(self)
+
+    def to_dict(self):
+        return {"id": self.id, "url": self.url, "mode": self.mode, "format": self.fid,
+                "bitrate": self.bitrate, "out": self.out, "priority": self.priority,
+                "state": self.state, "title": self.title, "error": self.error,
+                "path": self.filepath, "progress": dict(self.progress)}
+
+def _job_host(url):
+    import urllib.parse
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    for pre in ("www.", "m.", "music."):
+        if host.startswith(pre): return host[len(pre):]
+    return host
+
+def video_opts(fid, out, hook):
+    # AAC audio is preferred so the merge can stream-copy it (see merge_plan)
+    fmt = ("bestvideo+bestaudio[ext=m4a]/bestvideo+bestaudio/best" if FFMPEG_PATH else "best") \
+          if fid == "best" else \
+          (f"{fid}+bestaudio[ext=m4a]/{fid}+bestaudio/{fid}" if FFMPEG_PATH else fid)
+    opts = {
+        "format": fmt,
+        "paths": {"home": out},
+        "outtmpl": "%(title)s.%(ext)s",
+        "progress_hooks": [hook],
+        "quiet": True, "no_warnings": True, "noprogress": True,
+    }
+    if FFMPEG_PATH:
+        opts["ffmpeg_location"]     = os.path.dirname(FFMPEG_PATH)
+        opts["merge_output_format"] = "mp4"
+        opts["postprocessor_args"]  = {"merger": MERGE_ARGS["aac"]}
+    return opts
+
+def merge_plan(info):
+    # "copy" when the selected audio already plays from MP4, "aac" when it has to be
+    # transcoded (Opus, Vorbis, …); None when nothing is merged
+    fmts  = info.get("requested_formats") or ()
+    audio = [f for f in fmts if f.get("acodec") != "none"]
+    if len(fmts) < 2 or not audio: return None
+    codec = (audio[-1].get("acodec") or audio[-1].get("ext") or "").split(".")[0].lower()
+    return "copy" if codec in MERGE_COPY else "aac"
+
+def _merge_planner():
+    # Runs once the formats are chosen and points the merger at the planned arguments
+    class MergePlanPP(yt_dlp.postprocessor.PostProcessor):
+        def run(self, info):
+            plan = merge_plan(info)
+            if plan:
+                args = self.get_param("postprocessor_args") or {}
+                self._downloader.params["postprocessor_args"] = {**args, "merger": MERGE_ARGS[plan]}
+                self._hook_progress({"status": "planned", "merge": plan}, info)
+            return [], info
+    return MergePlanPP()
+
+def _artwork_pp():
+    # Stands in for writethumbnail: puts a copy of the cached JPEG where EmbedThumbnail
+    # looks for it (EmbedThumbnail deletes the file it embedded)
+    class ArtworkPP(yt_dlp.postprocessor.PostProcessor):
+        def run(self, info):
+            thumbs = [t for t in info.get("thumbnails") or () if t.get("url")]
+            tries  = reversed(thumbs) if thumbs else [{"url": info.get("thumbnail")}]
+            # Best first, like yt-dlp's own thumbnail writer: the largest size is often
+            # missing or not an image
+            art = thumb = err = None
+            for thumb in (t for t in tries if t.get("url")):
+                try:
+                    art, how = ARTWORK.get(thumb["url"])
+                    break
+                except Exception as e:
+                    err = e
+            if not art:
+                if err: self.report_warning(f"Cover art unavailable: {err}")
+                return [], info
+            dest = os.path.splitext(self._downloader.prepare_filename(info, "temp"))[0] + ".jpg"
+            shutil.copyfile(art, dest)
+            if not thumbs:
+                info["thumbnails"] = [thumb]
+            thumb["filepath"] = dest
+            self._hook_progress({"status": "planned", "artwork": how}, info)
+            return [], info
+    return ArtworkPP()
+
+def _space_pp():
+    # Reports the size of the chosen formats before anything is written; the job's
+    # postprocessor hook reserves it (see DiskSpace.reserve), waiting or failing there
+    class DiskSpacePP(yt_dlp.postprocessor.PostProcessor):
+        def run(self, info):
+            self._hook_progress({"status": "planned", "size": expected_size(info) or 0,
+                                 "merged": len(info.get("requested_formats") or ()) > 1}, info)
+            return [], info
+    return DiskSpacePP()
+
+def mp3_opts(bitrate, out, hook):
+    return {
+        "format": "bestaudio/best",
+        "paths": {"home": out},
+        "outtmpl": "%(title)s.%(ext)s",
+        "progress_hooks": [hook],
+        "quiet": True, "no_warnings": True, "noprogress": True,
+        "ffmpeg_location": os.path.dirname(FFMPEG_PATH),
+        "postprocessors": [   # the cover art is supplied by _artwork_pp
+            {"key": "FFmpegExtractAudio",
+             "preferredcodec": "mp3", "preferredquality": bitrate},
+            {"key": "FFmpegMetadata", "add_metadata": True},
+            {"key": "EmbedThumbnail"},
+        ],
+    }
+
+def _progress_hook(job):
+    seen = [0]   # bytes of the current file already charged to the bandwidth bucket
+    def h(d):
+        if job.abort.is_set():
+            raise JobAborted("Download aborted by user.")
+        if job.title is None:
+            job.title = (d.get("info_dict") or {}).get("title")
+        if d["status"] == "downloading":
+            done = d.get("downloaded_bytes") or 0
+            if done: job.mark("first_byte")
+            if job.resumed and not seen[0]:
+                seen[0] = done   # bytes counted so far include the .part from the last run
+            job.received  += done - seen[0] if done >= seen[0] else done
+            job.peak_speed = max(job.peak_speed, d.get("speed") or 0)
+            BANDWIDTH.consume(done - seen[0] if done >= seen[0] else done, job.abort)
+            seen[0] = done
+            if job.abort.is_set():
+                raise JobAborted("Download aborted by user.")
+            if d.get("fragment_count") and not job.progress.get("fragmented"):
+                job.progress["fragmented"] = True
+            job.update(JOB_DOWNLOADING,
+                       downloaded=done,
+                       total=d.get("total_bytes") or d.get("total_bytes_estimate") or 0,
+                       speed=d.get("speed") or 0,
+                       eta=d.get("eta") or 0)
+        elif d["status"] == "finished":
+            job.received += max(0, (d.get("downloaded_bytes") or d.get("total_bytes") or 0) - seen[0])
+            seen[0] = 0
+            job.mark("download_end", once=False)
+            job.update(JOB_POSTPROC)
+    return h
+
+def _postprocessor_hook(job):
+    def h(d):
+        if job.abort.is_set():
+            raise JobAborted("Download aborted by user.")
+        if d["status"] == "planned" and "size" in d:
+            job.update(expected=d["size"])
+            DISK.reserve(job, DISK.needs(job, d["size"], d["merged"]),
+                         on_wait=lambda n: job.update(space_wait=n))
+            if job.progress.get("space_wait"): job.update(space_wait=0)
+        elif d["status"] == "planned":
+            job.update(**{k: d[k] for k in ("merge", "artwork") if k in d})
+        elif d["status"] == "started" and d.get("postprocessor") not in BEFORE_DL_PPS:
+            if job.handoff: job.handoff(job)
+            job.pp_runs.append([d.get("postprocessor"), time.time(), None])
+            job.update(JOB_POSTPROC, postprocessor=d.get("postprocessor"))
+        elif d["status"] == "finished" and job.pp_runs and job.pp_runs[-1][2] is None:
+            job.pp_runs[-1][2] = time.time()
+    return h
+
+def _archive_filter(job):
+    # Catches archived items whose id only shows up after extraction
+    def f(info, incomplete):
+        if incomplete: return None
+        job.mark("extract_end")
+        job.key = info_key(info) or job.key
+        path = ARCHIVE.lookup(job.key, job.archive_mode)
+        if path:
+            job.filepath = path
+            job.update(JOB_SKIPPED)
+            return "already downloaded"
+    return f
+
+def _post_hook(job):
+    def h(path):
+        job.filepath = path
+    return h
+
+def run_job(job):
+    try:
+        _run_job(job)
+    finally:
+        DISK.release(job)
+        job.mark("finished")
+        TELEMETRY.record(job)
+        TUNER.observe(job)
+
+def _run_job(job):
+    if job.abort.is_set():
+        job.update(JOB_ABORTED); return
+    path = ARCHIVE.lookup(job.key, job.archive_mode)
+    if path:
+        job.filepath = path
+        job.update(JOB_SKIPPED); return
+    hook = _progress_hook(job)
+    opts = mp3_opts(job.bitrate, job.out, hook) if job.mode == "mp3" \
+           else video_opts(job.fid, job.out, hook)
+    opts["postprocessor_hooks"] = [_postprocessor_hook(job)]
+    opts["post_hooks"]          = [_post_hook(job)]
+    opts["match_filter"]        = _archive_filter(job)
+    if DISK.staging:
+        os.makedirs(DISK.staging, exist_ok=True)
+        opts["paths"]["temp"] = DISK.staging
+    job.mark("extract_start")
+    job.update(JOB_EXTRACTING)
+    try:
+        with YDL_POOL.lease(job.mode, opts) as ydl:
+            if job.mode == "video" and FFMPEG_PATH and not hasattr(ydl, "_aurora_planner"):
+                ydl._aurora_planner = _merge_planner()
+                ydl.add_post_processor(ydl._aurora_planner, when="before_dl")
+            if job.mode == "mp3" and not hasattr(ydl, "_aurora_artwork"):
+                ydl._aurora_artwork = _artwork_pp()
+                ydl.add_post_processor(ydl._aurora_artwork, when="before_dl")
+            if not hasattr(ydl, "_aurora_space"):
+                ydl._aurora_space = _space_pp()
+                ydl.add_post_processor(ydl._aurora_space, when="before_dl")
+            # Set on every lease: the instance may have been tuned for another site
+            conc, chunk = TUNER.settings(job.host)
+            ydl.params["concurrent_fragment_downloads"] = conc
+            ydl.params["http_chunk_size"] = chunk
+            job.update(fragments=conc, chunk=chunk)
+            info, job.info, done = job.info, None, False
+            if info and _info_ttl(info) > 0:
+                # Skip the second extraction; if the signed stream URLs turn out to have
+                # expired before anything was written, fall through to a normal download
+                # that re-extracts. Any other failure fails the job.
+                try:
+                    ydl.process_ie_result(copy.deepcopy(info), download=True)
+                    done = True
+                except yt_dlp.utils.DownloadError as e:
+                    if job.abort.is_set() or job.received or not _STALE_RE.search(str(e)): raise
+            if not done:
+                ydl.download([job.url])
+        if job.abort.is_set():
+            job.update(JOB_ABORTED)
+        elif job.state != JOB_SKIPPED:
+            ARCHIVE.record(job.key, job.archive_mode, job.filepath)
+            job.update(JOB_DONE)
+    except Exception as e:
+        if job.abort.is_set():
+            job.update(JOB_ABORTED)
+        else:
+            job.error = str(e)
+            job.update(JOB_FAILED)
+
+
+# ── Download queue ────────────────────────────────────────────────────────────
+
+class DownloadQueue:
+    # Jobs hold a download slot until their files are on disk, then move on to one of the
+    # post-processing slots so the next download can start while ffmpeg runs
+    def __init__(self, limit=MAX_DOWNLOADS, per_host=MAX_PER_HOST, on_update=None,
+                 pp_limit=PP_WORKERS, pp_backlog=None, journal=None):
+        self.limit      = max(1, int(limit))
+        self.per_host   = max(1, int(per_host))
+        self.pp_limit   = max(1, int(pp_limit))
+        self.pp_backlog = max(self.pp_limit, int(pp_backlog or PP_BACKLOG * self.pp_limit))
+        self.on_update  = on_update
+        self.journal    = journal
+        self.jobs      = {}
+        self._cv       = threading.Condition()
+        self._pending  = []     # heap of (-priority, seq, job)
+        self._seq      = itertools.count()
+        self._hosts    = {}     # host -> jobs currently running against it
+        self._running  = 0
+        self._workers  = 0
+        self._postproc = 0      # jobs past their download, waiting for or running ffmpeg
+        self._pp_busy  = 0
+
+    def submit(self, job):
+        with self._cv:
+            job.listener = self._changed
+            self.jobs[job.id] = job
+            if self.journal: self.journal.add(job)
+            heapq.heappush(self._pending, (-job.priority, next(self._seq), job))
+            self._spawn()
+            self._cv.notify_all()
+        self._changed(job)
+        return job
+
+    def set_limits(self, limit=None, per_host=None):
+        with self._cv:
+            if limit is not None:    self.limit    = max(1, int(limit))
+            if per_host is not None: self.per_host = max(1, int(per_host))
+            self._spawn()
+            self._cv.notify_all()
+
+    def cancel(self, job):
+        job.abort.set()
+        with self._cv:
+            queued = any(item[2] is job for item in self._pending)
+            if queued:
+                self._pending = [item for item in self._pending if item[2] is not job]
+                heapq.heapify(self._pending)
+        if queued:
+            job.update(JOB_ABORTED)
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            if not job.finished: self.cancel(job)
+
+    def active(self):
+        return [j for j in self.snapshot() if not j.finished]
+
+    def snapshot(self):
+        with self._cv:
+            return list(self.jobs.values())
+
+    def forget(self, keep):
+        # Drops all but the newest `keep` finished jobs so a long-running process stays small
+        with self._cv:
+            done = [j for j in self.jobs.values() if j.finished]
+            for job in done[:max(0, len(done) - keep)]:
+                del self.jobs[job.id]
+
+    def stats(self):
+        with self._cv:
+            return {"queued": len(self._pending), "running": self._running,
+                    "limit": self.limit, "per_host": self.per_host,
+                    "postproc": self._postproc, "pp_busy": self._pp_busy,
+                    "pp_limit": self.pp_limit,
+                    "hosts": {h: n for h, n in self._hosts.items() if n}}
+
+    def wait(self, timeout=None):
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cv:
+            while self._pending or self._running or self._postproc:
+                left = None if end is None else end - time.monotonic()
+                if left is not None and left <= 0: return False
+                self._cv.wait(left)
+        return True
+
+    def _changed(self, job):
+        if self.journal: self.journal.update(job)
+        if self.on_update: self.on_update(job)
+
+    def _spawn(self):
+        while self._workers < self.limit:
+            self._workers += 1
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def _take(self):
+        # Highest priority first, skipping hosts that are already at their limit
+        skipped, job = [], None
+        while self._pending:
+            item = heapq.heappop(self._pending)
+            if self._hosts.get(item[2].host, 0) < self.per_host:
+                job = item[2]; break
+            skipped.append(item)
+        for item in skipped:
+            heapq.heappush(self._pending, item)
+        return job
+
+    def _worker(self):
+        while True:
+            with self._cv:
+                while True:
+                    if self._workers > self.limit:
+                        self._workers -= 1; return
+                    if self._running < self.limit and self._postproc < self.pp_backlog:
+                        job = self._take()
+                        if job: break
+                    self._cv.wait()
+                self._running += 1
+                self._hosts[job.host] = self._hosts.get(job.host, 0) + 1
+                job.handoff = self._handoff
+            try:
+                run_job(job)
+            finally:
+                with self._cv:
+                    if job.handoff:   # never got as far as post-processing
+                        job.handoff = None
+                        self._running -= 1
+                        self._hosts[job.host] -= 1
+                        self._cv.notify_all()
+                    else:
+                        self._postproc -= 1
+                        self._pp_busy  -= 1
+                        self._cv.notify_all()
+                        return        # this thread already handed its worker place on
+
+    def _handoff(self, job):
+        # Runs on the job's thread when its first postprocessor starts. The download slot
+        # and a replacement worker go to the next job; this thread waits for an ffmpeg slot.
+        with self._cv:
+            job.handoff = None
+            self._running  -= 1
+            self._hosts[job.host] -= 1
+            self._workers  -= 1
+            self._postproc += 1
+            self._spawn()
+            self._cv.notify_all()
+            while self._pp_busy >= self.pp_limit and not job.abort.is_set():
+                self._cv.wait(0.5)
+            self._pp_busy += 1   # the worker's finally gives it back, also after an abort
+            if job.abort.is_set():
+                raise JobAborted("Download aborted by user.")
+
+
+# ── Playlists ─────────────────────────────────────────────────────────────────
+
+_COLLECTION_RE = re.compile(
+    r"youtube\.com/(?:playlist\?|@|channel/|c/|user/)|[?&]list=", re.I)
+PLAYLIST_PAGE  = 50   # entries requested per page from paged playlists
+PLAYLIST_TYPES = ("playlist", "multi_video")
+
+def is_collection_url(url):
+    # True or False when the URL alone tells, None when only an extraction can (a SoundCloud
+    # set, a Vimeo showcase, ...). Downloads send None through the playlist expander, whose
+    # flat extraction yields either the one video or every entry.
+    url = clean_url(url)
+    if _COLLECTION_RE.search(url): return True
+    return False if url_key(url) else None
+
+def parse_items(spec):
+    # "5-20", "20-", "-20" or "20" (the first 20) -> (start, end), 1-based and inclusive
+    spec = (spec or "").strip()
+    if not spec:
+        return 1, None
+    m = re.fullmatch(r"(\d*)\s*-\s*(\d*)", spec)
+    if m:
+        return max(1, int(m.group(1) or 1)), int(m.group(2)) if m.group(2) else None
+    if spec.isdigit():
+        return 1, int(spec)
+    raise ValueError(f"Invalid item range: {spec}")
+
+def _entry_url(entry):
+    url = entry.get("url") or entry.get("webpage_url") or ""
+    if "://" not in url and entry.get("ie_key") == "Youtube" and url:
+        url = f"https://www.youtube.com/watch?v={url}"
+    return url if "://" in url else None
+
+def _flat_info(ydl, url):
+    info = ydl.extract_info(url, download=False, process=False)
+    for _ in range(3):   # channel URLs redirect to their videos tab, and so on
+        if (info or {}).get("_type") not in ("url", "url_transparent"): break
+        info = ydl.extract_info(info["url"], download=False, process=False,
+                                ie_key=info.get("ie_key"))
+    return info or {}
+
+def playlist_info(url):
+    with YDL_POOL.lease("flat", FLAT_OPTS) as ydl:
+        info = _flat_info(ydl, clean_url(url))
+    return {"title": info.get("title") or info.get("id") or url,
+            "count": info.get("playlist_count"), "type": info.get("_type") or "video"}
+
+def iter_entries(url, start=1, end=None, limit=None, stop=None):
+    # Yields {"url", "title", "id", "key"} for each entry while later pages are still unfetched
+    with YDL_POOL.lease("flat", FLAT_OPTS) as ydl:
+        info = _flat_info(ydl, clean_url(url))
+        if info.get("_type") not in PLAYLIST_TYPES:
+            yield {"url": clean_url(url), "title": info.get("title"), "id": info.get("id"),
+                   "key": info_key(info)}
+            return
+
+        entries = info.get("entries") or []
+        if hasattr(entries, "getslice"):   # paged list: fetch one page at a time
+            def pages(paged=entries, i=start - 1):
+                while end is None or i < end:
+                    page = paged.getslice(i, i + PLAYLIST_PAGE if end is None
+                                          else min(i + PLAYLIST_PAGE, end))
+                    if not page: return
+                    yield from page
+                    i += len(page)
+            entries = pages()
+        else:
+            entries = itertools.islice(entries, start - 1, end)
+
+        n = 0
+        for entry in entries:
+            if (stop and stop.is_set()) or (limit and n >= limit): break
+            u = _entry_url(entry or {})
+            if not u: continue
+            n += 1
+            yield {"url": u, "title": entry.get("title"), "id": entry.get("id"),
+                   "key": info_key(entry)}
+
+def expand_playlist(url, submit, start=1, end=None, limit=None, stop=None):
+    n = 0
+    for entry in iter_entries(url, start, end, limit, stop):
+        submit(entry)
+        n += 1
+    return n
 
 
 # ── Main App ──────────────────────────────────────────────────────────────────
@@ -350,29 +2458,57 @@ def clean_url(url):
 class App:
     def __init__(self):
         self.root = tk.Tk()
+        _trace("window")
         self.root.title(APP_NAME)
-        self.root.geometry("880x790")
+        self.root.geometry("880x940")
         self.root.resizable(True, True)
-        self.root.minsize(820, 720)
+        self.root.minsize(820, 760)
         self.root.configure(bg="#1e1e2e")
         self.root.eval("tk::PlaceWindow . center")
 
-        self.abort_flag   = threading.Event()
         self.formats      = []
+        self._fetched     = None   # (url, info) from the last fetch, reused by Download
+        self._lookup      = None   # latest lookup, speculative or not, see _start_lookup
+        self._attached    = None   # the lookup the Fetch button is waiting for
+        self._spec_timer  = None
+        self._clip_last   = None
+        self.url_var      = tk.StringVar()
         self.selected_fmt = tk.StringVar()
         self.dl_mode      = tk.StringVar(value="video")
         self.output_dir   = tk.StringVar(value=os.path.expanduser("~/Downloads"))
+        self.items        = tk.StringVar()
         self._deps_ready  = False
-        self._fetch_timer = None   # used for timeout
 
         settings = _load_settings()
         self._lang = settings.get("language", "en")
 
+        self.queue        = DownloadQueue(settings.get("max_downloads", MAX_DOWNLOADS),
+                                          settings.get("max_per_host", MAX_PER_HOST),
+                                          on_update=self._job_changed, journal=JOURNAL)
+        self.parallel     = tk.IntVar(value=self.queue.limit)
+        BANDWIDTH.configure(*_bandwidth_settings(settings))
+        TELEMETRY.textfile = settings.get("metrics_textfile")
+        self.bw_rate      = tk.IntVar(value=BANDWIDTH.rate)
+        TUNER.fixed       = int(settings.get("fragments") or 0)
+        self.frag_n       = tk.IntVar(value=TUNER.fixed)
+        self.clip_watch   = tk.BooleanVar(value=bool(settings.get("watch_clipboard")))
+        DISK.staging      = settings.get("staging_dir") or None
+        self._batch       = []     # jobs submitted since the queue was last idle
+        self._reported    = set()  # ids of finished jobs already announced
+        self._dirty       = {}     # job id -> job with progress not yet drawn
+        self._dirty_lock  = threading.Lock()
+        self._expanding   = 0      # playlists still being enumerated into the queue
+        self._expand_stop = threading.Event()
+
         self._apply_styles()
         self._build_ui()
         self._mode_changed()
+        _trace("ui")
         self.root.update()
+        _trace("first_paint")
 
+        self._pump()
+        self._watch_clipboard()
         threading.Thread(target=self._bootstrap, daemon=True).start()
         self.root.mainloop()
 
@@ -406,6 +2542,11 @@ class App:
         s.configure("TRadiobutton", background=bg, foreground=fg,
                      font=("Segoe UI", 10), focuscolor=bg)
         s.map("TRadiobutton",       background=[("active", bg)])
+        s.configure("Treeview",     background=eb, fieldbackground=eb, foreground=fg,
+                     font=("Segoe UI", 9), borderwidth=0, rowheight=22)
+        s.configure("Treeview.Heading", background="#45475a", foreground=fg,
+                     font=("Segoe UI", 9, "bold"), borderwidth=0)
+        s.map("Treeview",           background=[("selected", "#45475a")])
 
     # ── Localization ─────────────────────────────────────────────────────────
 
@@ -431,12 +2572,27 @@ class App:
         self.lbl_dur_label.config(text=self._t("duration"))
         self.opt_frame.config(text=self._t("options"))
         self.lbl_save.config(text=self._t("save_to"))
+        self.lbl_items.config(text=self._t("items"))
         self.browse_btn.config(text=self._t("browse"))
         self.dl_btn.config(text=self._t("download"))
         self.abort_btn.config(text=self._t("abort"))
         self.prog_frame.config(text=self._t("progress"))
         self._mode_changed()
         self.settings_menu.entryconfig(0, label=self._t("language_tr"))
+        self.settings_menu.entryconfig(1, label=self._t("parallel"))
+        self.settings_menu.entryconfig(2, label=self._t("bandwidth"))
+        self.bw_menu.entryconfig(0, label=self._t("unlimited"))
+        self.settings_menu.entryconfig(3, label=self._t("fragments"))
+        self.frag_menu.entryconfig(0, label=self._t("auto"))
+        self.settings_menu.entryconfig(4, label=self._t("watch_clipboard"))
+        self.settings_menu.entryconfig(5, label=self._t("staging"))
+        self.staging_menu.entryconfig(0, label=self._t("staging_choose"))
+        self.staging_menu.entryconfig(1, label=self._t("staging_off"))
+        self.queue_frame.config(text=self._t("queue"))
+        for col in ("title", "state", "progress"):
+            self.tree.heading(col, text=self._t(f"col_{col}"))
+        for job in self.queue.jobs.values():
+            self._show_job(job)
         self.help_menu.entryconfig(0, label=self._t("about"))
         self.menubar.entryconfig(0, label=self._t("help"))
         self.menubar.entryconfig(1, label=self._t("settings"))
@@ -461,6 +2617,33 @@ class App:
                                       activebackground="#45475a", activeforeground="#cdd6f4")
         self.settings_menu.add_command(label=self._t("language_tr"),
                                         command=self._toggle_language)
+        self.parallel_menu = tk.Menu(self.settings_menu, tearoff=0, bg="#313244", fg="#cdd6f4",
+                                      activebackground="#45475a", activeforeground="#cdd6f4")
+        for n in range(1, 9):
+            self.parallel_menu.add_radiobutton(label=str(n), value=n, variable=self.parallel,
+                                                command=self._set_parallel)
+        self.settings_menu.add_cascade(label=self._t("parallel"), menu=self.parallel_menu)
+        self.bw_menu = tk.Menu(self.settings_menu, tearoff=0, bg="#313244", fg="#cdd6f4",
+                                activebackground="#45475a", activeforeground="#cdd6f4")
+        for mb in BW_RATES:
+            self.bw_menu.add_radiobutton(label=f"{mb} MB/s" if mb else self._t("unlimited"),
+                                          value=mb * 1_048_576, variable=self.bw_rate,
+                                          command=self._set_bandwidth)
+        self.settings_menu.add_cascade(label=self._t("bandwidth"), menu=self.bw_menu)
+        self.frag_menu = tk.Menu(self.settings_menu, tearoff=0, bg="#313244", fg="#cdd6f4",
+                                  activebackground="#45475a", activeforeground="#cdd6f4")
+        for n in FRAG_CHOICES:
+            self.frag_menu.add_radiobutton(label=str(n) if n else self._t("auto"), value=n,
+                                            variable=self.frag_n, command=self._set_fragments)
+        self.settings_menu.add_cascade(label=self._t("fragments"), menu=self.frag_menu)
+        self.settings_menu.add_checkbutton(label=self._t("watch_clipboard"), variable=self.clip_watch,
+                                            command=self._set_clip_watch)
+        self.staging_menu = tk.Menu(self.settings_menu, tearoff=0, bg="#313244", fg="#cdd6f4",
+                                     activebackground="#45475a", activeforeground="#cdd6f4")
+        self.staging_menu.add_command(label=self._t("staging_choose"), command=self._choose_staging)
+        self.staging_menu.add_command(label=self._t("staging_off"),
+                                       command=lambda: self._set_staging(None))
+        self.settings_menu.add_cascade(label=self._t("staging"), menu=self.staging_menu)
         self.menubar.add_cascade(label=self._t("settings"), menu=self.settings_menu)
         self.root.config(menu=self.menubar)
 
@@ -481,12 +2664,13 @@ class App:
         self.url_frame = ttk.LabelFrame(self.root, text=self._t("video_url"), padding=10)
         self.url_frame.pack(fill="x", padx=P, pady=6)
         ur = ttk.Frame(self.url_frame); ur.pack(fill="x")
-        self.url_entry = ttk.Entry(ur, font=("Segoe UI", 10))
+        self.url_entry = ttk.Entry(ur, font=("Segoe UI", 10), textvariable=self.url_var)
         self.url_entry.pack(side="left", fill="x", expand=True, ipady=5)
         self.url_entry.insert(0, self._t("paste_placeholder"))
         self.url_entry.config(foreground="#6c7086")
         self.url_entry.bind("<FocusIn>",  self._clr_ph)
         self.url_entry.bind("<FocusOut>", self._rst_ph)
+        self.url_var.trace_add("write", self._url_changed)
         self.fetch_btn = ttk.Button(ur, text=self._t("fetch_info"), style="Accent.TButton",
                                     command=self._fetch_thread)
         self.fetch_btn.pack(side="left", padx=(10, 0), ipady=3)
@@ -530,6 +2714,10 @@ class App:
         self.res_combo = ttk.Combobox(rr, textvariable=self.selected_fmt,
                                        state="readonly", font=("Segoe UI", 10))
         self.res_combo.pack(side="left", fill="x", expand=True, ipady=4)
+        self.lbl_items = ttk.Label(rr, text=self._t("items"))
+        self.lbl_items.pack(side="left", padx=(12, 6))
+        ttk.Entry(rr, textvariable=self.items, width=10,
+                  font=("Segoe UI", 10)).pack(side="left", ipady=4)
         xr = ttk.Frame(self.opt_frame); xr.pack(fill="x")
         self.lbl_save = ttk.Label(xr, text=self._t("save_to"), width=10)
         self.lbl_save.pack(side="left")
@@ -550,7 +2738,7 @@ class App:
 
         # ── Progress ──────────────────────────────────────────────────────────
         self.prog_frame = ttk.LabelFrame(self.root, text=self._t("progress"), padding=12)
-        self.prog_frame.pack(fill="x", padx=P, pady=(0, P))
+        self.prog_frame.pack(fill="x", padx=P, pady=(0, 6))
         self.pbar = ttk.Progressbar(self.prog_frame, orient="horizontal",
                                      mode="determinate", maximum=100)
         self.pbar.pack(fill="x", pady=(0, 8))
@@ -570,6 +2758,20 @@ class App:
                                      wraplength=840, justify="left")
         self.lbl_status.pack(anchor="w", pady=(8, 0))
 
+        # ── Queue ─────────────────────────────────────────────────────────────
+        self.queue_frame = ttk.LabelFrame(self.root, text=self._t("queue"), padding=10)
+        self.queue_frame.pack(fill="both", expand=True, padx=P, pady=(0, P))
+        self.tree = ttk.Treeview(self.queue_frame, columns=("title", "state", "progress"),
+                                 show="headings", height=5, selectmode="extended")
+        for col, w, st in (("title", 520, True), ("state", 150, False), ("progress", 110, False)):
+            self.tree.heading(col, text=self._t(f"col_{col}"), anchor="w")
+            self.tree.column(col, width=w, stretch=st, anchor="w")
+        tsb = ttk.Scrollbar(self.queue_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=tsb.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        tsb.pack(side="right", fill="y")
+        self.tree.bind("<<TreeviewSelect>>", lambda _: self._show_progress())
+
     # ── About dialog ─────────────────────────────────────────────────────────
 
     def _show_about(self):
@@ -649,15 +2851,52 @@ class App:
     # ── Bootstrap ────────────────────────────────────────────────────────────
 
     def _bootstrap(self):
-        ensure_yt_dlp(on_status=self._safe_status)
-        ensure_ffmpeg(on_status=self._safe_status)
+        bootstrap_deps(on_status=self._safe_status,
+                       on_ready=lambda: self.root.after(0, self._deps_usable))
         self.root.after(0, self._bootstrap_done)
 
     def _safe_status(self, msg):
-        self.root.after(0, lambda: self.lbl_status.config(text=msg, foreground="#f9e2af"))
+        # Once the app is usable, late update-check messages stay on the yt-dlp line
+        def show():
+            lbl = self.lbl_ytdlp if self._deps_ready else self.lbl_status
+            lbl.config(text=msg, foreground="#f9e2af")
+        self.root.after(0, show)
+
+    def _deps_usable(self):
+        if self._deps_ready: return
+        self._deps_ready = True
+        if yt_dlp is not None:
+            threading.Thread(target=EXTRACTORS.start, daemon=True).start()
+
+        if yt_dlp is not None:
+            self.lbl_ytdlp.config(text=f"✔ yt-dlp {YT_DLP_VERSION}{self._t('ytdlp_checking')}",
+                                   foreground="#a6e3a1")
+
+        if FFMPEG_PATH:
+            self.lbl_ffmpeg.config(text=f"✔ ffmpeg: {FFMPEG_PATH}", foreground="#a6e3a1")
+        else:
+            self.lbl_ffmpeg.config(text=self._t("ffmpeg_disabled"),
+                foreground="#f38ba8")
+
+        self.lbl_status.config(text=self._t("ready"), foreground="#6c7086")
+        _trace("ready")
+        threading.Thread(target=_save_trace, daemon=True).start()
+        if yt_dlp is not None:
+            self._resume()
+
+    def _resume(self):
+        jobs = JOURNAL.resume()
+        if not jobs: return
+        if not self.queue.active() and not self._expanding:
+            self._batch = []
+        self._batch.extend(jobs)
+        self.abort_btn.config(state="normal")
+        for job in jobs:
+            self.queue.submit(job)
+        self._setstatus(self._t("resumed").format(n=len(jobs)), "#89b4fa")
 
     def _bootstrap_done(self):
-        self._deps_ready = True
+        self._deps_usable()
         self.dep_pbar.stop()
         self.dep_pbar.pack_forget()
 
@@ -669,14 +2908,6 @@ class App:
             s = self._t("ytdlp_updated") if YT_DLP_UPDATED else self._t("ytdlp_uptodate")
             self.lbl_ytdlp.config(text=f"✔ yt-dlp {YT_DLP_VERSION}{s}", foreground=c)
 
-        if FFMPEG_PATH:
-            self.lbl_ffmpeg.config(text=f"✔ ffmpeg: {FFMPEG_PATH}", foreground="#a6e3a1")
-        else:
-            self.lbl_ffmpeg.config(text=self._t("ffmpeg_disabled"),
-                foreground="#f38ba8")
-
-        self.lbl_status.config(text=self._t("ready"), foreground="#6c7086")
-
     # ── Placeholder ───────────────────────────────────────────────────────────
 
     def _clr_ph(self, _=None):
@@ -716,9 +2947,12 @@ class App:
         if d: self.output_dir.set(d)
 
     def _setstatus(self, msg, color="#6c7086"):
-        self.root.after(0, lambda: self.lbl_status.config(text=msg, foreground=color))
+        if threading.current_thread() is threading.main_thread():
+            self.lbl_status.config(text=msg, foreground=color)
+        else:
+            self.root.after(0, lambda: self.lbl_status.config(text=msg, foreground=color))
 
-    # ── Fetch info with timeout ───────────────────────────────────────────────
+    # ── Fetch info ────────────────────────────────────────────────────────────
 
     def _fetch_thread(self):
         if not self._deps_ready:
@@ -734,38 +2968,115 @@ class App:
 
         self.fetch_btn.config(state="disabled")
         self._setstatus(self._t("fetching_info"), "#f9e2af")
+        # A speculative lookup of the same URL, finished or still running, is reused
+        lookup = self._lookup
+        if lookup is None or lookup["url"] != clean_url(url) or lookup["failed"]:
+            lookup = self._start_lookup(url)
+        self._attached = lookup
+        if lookup["result"]:
+            self._lookup_done(lookup)
+
+    def _start_lookup(self, raw_url):
+        if self._lookup and not self._lookup["result"]:
+            self._lookup["cancel"].set()
+        lookup = {"url": clean_url(raw_url), "cancel": threading.Event(),
+                  "result": None, "failed": False}
+        self._lookup = lookup
+        threading.Thread(target=self._fetch_worker, args=(lookup,), daemon=True).start()
+        return lookup
+
+    def _lookup_done(self, lookup):
+        # Main thread; the result is only shown once the Fetch button asks for it
+        if lookup is self._attached and lookup["result"]:
+            self._attached = None
+            lookup["result"]()
+
+    # ── Speculative lookups ───────────────────────────────────────────────────
+
+    def _url_changed(self, *_):
+        text = self.url_entry.get().strip()
+        lookup = self._lookup
+        if text and lookup and not lookup["result"] and lookup is not self._attached \
+                and clean_url(text) != lookup["url"]:
+            lookup["cancel"].set()   # the URL it was started for is gone
+            self._lookup = None
+        if self._spec_timer is not None:
+            self.root.after_cancel(self._spec_timer)
+        self._spec_timer = self.root.after(PREFETCH_DELAY, self._speculate_entry)
+
+    def _speculate_entry(self):
+        self._spec_timer = None
+        self._speculate(self.url_entry.get().strip())
+
+    def _speculate(self, text):
+        # Looks up a single recognised URL before Fetch is clicked
+        if not self._deps_ready or yt_dlp is None or self._attached: return
+        if not text or len(text.split()) != 1: return
+        if not (url_key(text) or is_collection_url(text)): return
+        if self._lookup and self._lookup["url"] == clean_url(text) and not self._lookup["failed"]:
+            return
+        self._start_lookup(text)
+
+    def _watch_clipboard(self):
+        if self.clip_watch.get():
+            try:
+                text = self.root.clipboard_get().strip()
+            except tk.TclError:
+                text = ""
+            if text != self._clip_last:
+                self._clip_last = text
+                self._speculate(text)
+        self.root.after(CLIPBOARD_POLL, self._watch_clipboard)
+
+    def _choose_staging(self):
+        d = filedialog.askdirectory(initialdir=DISK.staging or os.path.expanduser("~"))
+        if d: self._set_staging(d)
+
+    def _set_staging(self, path):
+        DISK.staging = path
+        settings = _load_settings()
+        settings["staging_dir"] = path
+        _save_settings(settings)
 
-        # Start timeout timer
-        self._fetch_timed_out = False
-        self._fetch_timer = self.root.after(
-            FETCH_TIMEOUT * 1000, self._fetch_timeout
-        )
-
-        threading.Thread(target=self._fetch_worker, args=(url,), daemon=True).start()
+    def _set_clip_watch(self):
+        settings = _load_settings()
+        settings["watch_clipboard"] = self.clip_watch.get()
+        _save_settings(settings)
 
     def _fetch_timeout(self):
-        self._fetch_timed_out = True
         self._setstatus(
             self._t("fetch_timeout").format(t=FETCH_TIMEOUT),
             "#f38ba8"
         )
         self.fetch_btn.config(state="normal")
 
-    def _cancel_fetch_timer(self):
-        if self._fetch_timer is not None:
-            self.root.after_cancel(self._fetch_timer)
-            self._fetch_timer = None
-
-    def _fetch_worker(self, raw_url):
-        url = clean_url(raw_url)
+    def _fetch_worker(self, lookup):
+        # The lookup runs in an extraction process that is killed at FETCH_TIMEOUT or when
+        # the lookup is cancelled; the outcome is stored for _lookup_done to show
+        url, cancel = lookup["url"], lookup["cancel"]
+        def finish(result, failed=False):
+            lookup["failed"], lookup["result"] = failed, result
+            self.root.after(0, lambda: self._lookup_done(lookup))
         try:
-            opts = {"quiet": True, "no_warnings": True, "skip_download": True}
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-
-            # If timeout already fired, discard result silently
-            if self._fetch_timed_out:
-                return
+            # Unknown sites get a flat lookup first, so a collection is never resolved
+            # entry by entry just to show its title
+            kind = is_collection_url(url)
+            info = None if kind else META_CACHE.get(url)
+            if info is None and kind is not False:
+                pl = EXTRACTORS.extract("playlist", url, cancel=cancel)
+                if kind or pl["type"] in PLAYLIST_TYPES:
+                    title = self._t("playlist").format(title=pl["title"])
+                    count = self._t("playlist_count").format(n=pl["count"]) if pl["count"] else "—"
+                    finish(lambda: self._fetch_done(
+                        title, count, [("best", self._t("best_auto"))], playlist=True))
+                    return
+
+            cached = info is not None
+            keep   = cached
+            if not cached:
+                info = EXTRACTORS.extract("info", url, cancel=cancel)
+                if info and info.get("_type", "video") == "video":
+                    keep = META_CACHE.put(url, info)
 
             if not info:
                 raise ValueError("No info returned — check the URL.")
@@ -791,26 +3102,30 @@ class App:
                 warn  = self._t("needs_ffmpeg") if not FFMPEG_PATH and h > 720 else ""
                 choices.append((fid, f"{h}p{fps_s}  [{ext}]{sz_s}{warn}  (id:{fid})"))
 
-            self.root.after(0, lambda: self._fetch_done(title, dur_st, choices))
+            # Only a single video is reused by Download; anything else is expanded there
+            fetched = (url, info) if keep and info.get("_type", "video") == "video" else None
+            finish(lambda: self._fetch_done(title, dur_st, choices, cached, fetched=fetched))
+        except LookupCancelled:
+            pass
+        except TimeoutError:
+            finish(self._fetch_timeout, failed=True)
         except Exception as e:
-            if self._fetch_timed_out:
-                return
             err = str(e)
-            self.root.after(0, lambda: self._fetch_err(err))
+            finish(lambda: self._fetch_err(err), failed=True)
 
-    def _fetch_done(self, title, dur_st, choices):
-        self._cancel_fetch_timer()
-        self.formats = choices
+    def _fetch_done(self, title, dur_st, choices, cached=False, playlist=False, fetched=None):
+        self.formats  = choices
+        self._fetched = fetched
         self.lbl_title.config(text=title)
         self.lbl_dur.config(text=dur_st)
         if self.dl_mode.get() == "video":
             self.res_combo.config(values=[c[1] for c in choices])
             self.res_combo.current(0)
-        self._setstatus(self._t("info_fetched"), "#a6e3a1")
+        msg = "playlist_fetched" if playlist else "info_cached" if cached else "info_fetched"
+        self._setstatus(self._t(msg), "#a6e3a1")
         self.fetch_btn.config(state="normal")
 
     def _fetch_err(self, err):
-        self._cancel_fetch_timer()
         self._setstatus(f"Error: {err}", "#f38ba8")
         messagebox.showerror(self._t("fetch_error"), f"{self._t('fetch_err_msg')}{err}")
         self.fetch_btn.config(state="normal")
@@ -828,135 +3143,764 @@ class App:
         if not url or url in ("Paste URL here…", "URL'yi buraya yapıştırın…"):
             messagebox.showwarning(self._t("no_url"), self._t("paste_url_first"))
             return
-        mode = self.dl_mode.get()
-        if mode == "video" and not self.formats:
+        urls  = dedupe_urls(url.split())
+        known = self._fetched[0] if self._fetched else None   # fetched as a single video
+        lists = [u for u in urls if is_collection_url(u) is not False and clean_url(u) != known]
+        mode  = self.dl_mode.get()
+        if mode == "video" and not self.formats and len(urls) == 1 and not lists:
             messagebox.showwarning(self._t("no_format"), self._t("fetch_first"))
             return
         if mode == "mp3" and not FFMPEG_PATH:
             messagebox.showerror(self._t("ffmpeg_required"), self._t("ffmpeg_not_found"))
             return
+        try:
+            start, end = parse_items(self.items.get())
+        except ValueError:
+            messagebox.showwarning(self._t("options").strip(), self._t("bad_items"))
+            return
 
         idx = self.res_combo.current()
         out = self.output_dir.get()
-        self.abort_flag.clear()
-        self.dl_btn.config(state="disabled")
-        self.abort_btn.config(state="normal")
-        self.pbar["value"] = 0
-        for lbl, txt in [(self.lbl_pct,"0%"), (self.lbl_spd,"Speed: —"),
-                          (self.lbl_eta,"ETA: —"), (self.lbl_size,"Size: —")]:
-            lbl.config(text=txt)
-
         if mode == "mp3":
-            br = ["320","256","192","128","96"][max(idx, 0)]
+            br   = MP3_BITRATES[max(idx, 0)]
+            make = lambda u, title=None, key=None: Job(u, "mp3", bitrate=br, out=out,
+                                                       title=title, key=key)
             self._setstatus(self._t("starting_mp3").format(br=br), "#89b4fa")
-            t = threading.Thread(target=self._dl_mp3,
-                                  args=(clean_url(url), br, out), daemon=True)
         else:
-            fid = self.formats[idx][0] if idx >= 0 and self.formats else "best"
+            fid  = self.formats[idx][0] if len(urls) == 1 and idx >= 0 and self.formats else "best"
+            make = lambda u, title=None, key=None: Job(u, "video", fid=fid, out=out,
+                                                       title=title, key=key)
             self._setstatus(self._t("starting_video"), "#89b4fa")
-            t = threading.Thread(target=self._dl_video,
-                                  args=(clean_url(url), fid, out), daemon=True)
-        t.start()
-
-    # ── Progress hook ─────────────────────────────────────────────────────────
-
-    def _hook(self):
-        def h(d):
-            if self.abort_flag.is_set():
-                raise Exception("Download aborted by user.")
-            if d["status"] == "downloading":
-                dl  = d.get("downloaded_bytes", 0)
-                tot = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
-                spd = d.get("speed") or 0
-                eta = d.get("eta") or 0
-                pct = (dl / tot * 100) if tot else 0
-                sm  = spd / 1_048_576
-                es  = time.strftime("%M:%S", time.gmtime(eta)) if eta else "—"
-                ss  = f"{tot/1_048_576:.1f} MB" if tot else "—"
-                def upd():
-                    self.pbar["value"] = pct
-                    self.lbl_pct.config(text=f"{pct:.1f}%")
-                    self.lbl_spd.config(text=f"Speed: {sm:.2f} MB/s")
-                    self.lbl_eta.config(text=f"ETA: {es}")
-                    self.lbl_size.config(text=f"Size: {ss}")
-                    self._setstatus(self._t("downloading").format(pct=pct), "#89b4fa")
-                self.root.after(0, upd)
-            elif d["status"] == "finished":
-                self.root.after(0, lambda: self._setstatus(self._t("post_processing"), "#f9e2af"))
-        return h
-
-    # ── Video download ────────────────────────────────────────────────────────
-
-    def _dl_video(self, url, fid, out):
-        fmt = ("bestvideo+bestaudio/best" if FFMPEG_PATH else "best") if fid == "best" \
-              else (f"{fid}+bestaudio/{fid}" if FFMPEG_PATH else fid)
-        opts = {
-            "format": fmt,
-            "outtmpl": os.path.join(out, "%(title)s.%(ext)s"),
-            "progress_hooks": [self._hook()],
-            "quiet": True, "no_warnings": True,
-        }
-        if FFMPEG_PATH:
-            opts["ffmpeg_location"]     = os.path.dirname(FFMPEG_PATH)
-            opts["merge_output_format"] = "mp4"
-            opts["postprocessor_args"]  = {
-                "merger": ["-c:v","copy","-c:a","aac","-b:a","192k"]}
-        self._run(opts, url, "Video")
-
-    # ── MP3 download ──────────────────────────────────────────────────────────
-
-    def _dl_mp3(self, url, bitrate, out):
-        opts = {
-            "format": "bestaudio/best",
-            "outtmpl": os.path.join(out, "%(title)s.%(ext)s"),
-            "progress_hooks": [self._hook()],
-            "quiet": True, "no_warnings": True,
-            "ffmpeg_location": os.path.dirname(FFMPEG_PATH),
-            "writethumbnail": True,
-            "postprocessors": [
-                {"key": "FFmpegExtractAudio",
-                 "preferredcodec": "mp3", "preferredquality": bitrate},
-                {"key": "FFmpegMetadata", "add_metadata": True},
-                {"key": "EmbedThumbnail"},
-            ],
-        }
-        self._run(opts, url, "MP3")
-
-    # ── Shared runner ─────────────────────────────────────────────────────────
-
-    def _run(self, opts, url, label):
-        try:
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                ydl.download([url])
-            if not self.abort_flag.is_set():
-                self.root.after(0, lambda: self._done(label))
-        except Exception as e:
-            err = str(e)
-            if "aborted" in err.lower():
-                self.root.after(0, lambda: self._setstatus(self._t("dl_aborted"), "#f38ba8"))
-            else:
-                self.root.after(0, lambda: self._setstatus(f"Error: {err}", "#f38ba8"))
-                self.root.after(0, lambda: messagebox.showerror(self._t("dl_error"), err))
-        finally:
-            self.root.after(0, self._reset)
+        jobs = [make(u) for u in urls if u not in lists]
+        if len(jobs) == 1 and self._fetched and self._fetched[0] == jobs[0].url:
+            jobs[0].info = self._fetched[1]
+        if len(jobs) > 1:
+            self._setstatus(self._t("queued_n").format(n=len(jobs)), "#89b4fa")
+        if lists:
+            self._setstatus(self._t("expanding").format(n=0), "#89b4fa")
+
+        if not self.queue.active() and not self._expanding:
+            self._batch = []
+            self.pbar["value"] = 0
+            for lbl, txt in [(self.lbl_pct,"0%"), (self.lbl_spd,"Speed: —"),
+                              (self.lbl_eta,"ETA: —"), (self.lbl_size,"Size: —")]:
+                lbl.config(text=txt)
+        self._batch.extend(jobs)
+        self.abort_btn.config(state="normal")
+        for job in jobs:
+            self.queue.submit(job)
+        for u in lists:
+            self._expand(u, make, start, end)
+
+    def _expand(self, url, make, start, end):
+        # Entries are queued as the playlist pages come in, so downloads start right away
+        self._expanding += 1
+        self._expand_stop.clear()
+        def submit(entry):
+            job = make(entry["url"], entry["title"], entry["key"])
+            self._batch.append(job)
+            self.queue.submit(job)
+        def run():
+            n, err = 0, None
+            try:
+                n = expand_playlist(url, submit, start, end, stop=self._expand_stop)
+            except Exception as e:
+                err = str(e)
+            self.root.after(0, lambda: self._expand_done(n, err))
+        threading.Thread(target=run, daemon=True).start()
+
+    def _expand_done(self, n, err):
+        self._expanding -= 1
+        if err:
+            self._setstatus(f"Error: {err}", "#f38ba8")
+        else:
+            self._setstatus(self._t("expanded").format(n=n), "#89b4fa")
+        if not self._expanding and all(j.finished for j in self._batch):
+            self._batch_done()
 
-    def _done(self, label):
-        self.pbar["value"] = 100
-        self.lbl_pct.config(text="100%")
-        self._setstatus(self._t("dl_complete").format(label=label), "#a6e3a1")
-        messagebox.showinfo(self._t("done"),
-                            self._t("saved_to").format(label=label, path=self.output_dir.get()))
+    def _set_parallel(self):
+        self.queue.set_limits(limit=self.parallel.get())
+        settings = _load_settings()
+        settings["max_downloads"] = self.queue.limit
+        _save_settings(settings)
+
+    def _set_fragments(self):
+        TUNER.fixed = self.frag_n.get()
+        settings = _load_settings()
+        settings["fragments"] = TUNER.fixed
+        _save_settings(settings)
+
+    def _set_bandwidth(self):
+        BANDWIDTH.configure(rate=self.bw_rate.get())
+        settings = _load_settings()
+        settings["rate_limit"] = f"{BANDWIDTH.rate // 1024}K" if BANDWIDTH.rate else 0
+        _save_settings(settings)
+
+    # ── Job progress ──────────────────────────────────────────────────────────
+
+    def _job_changed(self, job):
+        # Called from worker threads: only record the job, _pump draws it
+        with self._dirty_lock:
+            self._dirty[job.id] = job
+
+    def _pump(self):
+        with self._dirty_lock:
+            jobs, self._dirty = self._dirty, {}
+        for job in jobs.values():
+            self._show_job(job)
+        self.root.after(1000 // PROGRESS_HZ, self._pump)
+
+    def _job_pct(self, job):
+        if job.state in (JOB_DONE, JOB_SKIPPED): return 100.0
+        tot = job.progress.get("total") or 0
+        return job.progress.get("downloaded", 0) / tot * 100 if tot else 0.0
+
+    def _state_text(self, job):
+        key = {JOB_DOWNLOADING: "downloading_st"}.get(job.state, job.state)
+        return self._t(key)
+
+    def _show_job(self, job):
+        iid  = str(job.id)
+        vals = (job.title or job.url, self._state_text(job), f"{self._job_pct(job):.1f}%")
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=vals)
+        else:
+            self.tree.insert("", "end", iid=iid, values=vals)
+            self.tree.see(iid)
+        if job is self._progress_job():
+            self._show_progress()
+        if job.finished and job.id not in self._reported:
+            self._reported.add(job.id)
+            self._job_finished(job)
+
+    def _progress_job(self):
+        sel = self.tree.selection()
+        if sel:
+            return self.queue.jobs.get(int(sel[0]))
+        live = [j for j in self._batch if not j.finished and j.state != JOB_QUEUED]
+        return live[-1] if live else (self._batch[-1] if self._batch else None)
+
+    def _show_progress(self):
+        job = self._progress_job()
+        if job is None: return
+        p   = job.progress
+        pct = self._job_pct(job)
+        tot = p.get("total") or 0
+        eta = p.get("eta") or 0
+        self.pbar["value"] = pct
+        self.lbl_pct.config(text=f"{pct:.1f}%")
+        lim = BANDWIDTH.limit()
+        cap = f"  (all: {BANDWIDTH.effective()/1_048_576:.2f} / {lim/1_048_576:.2f} MB/s)" if lim else ""
+        self.lbl_spd.config(text=f"Speed: {(p.get('speed') or 0)/1_048_576:.2f} MB/s{cap}")
+        self.lbl_eta.config(text=f"ETA: {time.strftime('%M:%S', time.gmtime(eta)) if eta else '—'}")
+        self.lbl_size.config(text=f"Size: {f'{tot/1_048_576:.1f} MB' if tot else '—'}")
+        if job.state == JOB_DOWNLOADING:
+            tuning = self._t("tuning_frag").format(n=p["fragments"]) if p.get("fragmented") else \
+                     self._t("tuning_chunk").format(mb=p["chunk"] // 1_048_576) if p.get("chunk") else ""
+            self._setstatus(self._t("downloading").format(pct=pct) +
+                            (f"  ·  {tuning}" if tuning else ""), "#89b4fa")
+        elif p.get("space_wait"):
+            self._setstatus(self._t("waiting_space").format(mb=p["space_wait"] // 1_048_576), "#f9e2af")
+        elif job.state == JOB_POSTPROC:
+            merge = f" ({self._t('merge_' + p['merge'])})" if p.get("merge") else ""
+            self._setstatus(self._t("post_processing") + merge, "#f9e2af")
+
+    def _job_finished(self, job):
+        if job.state == JOB_DONE:
+            self._setstatus(self._t("dl_complete").format(label=job.label), "#a6e3a1")
+        elif job.state == JOB_SKIPPED:
+            self._setstatus(self._t("dl_skipped").format(path=job.filepath), "#a6e3a1")
+        elif job.state == JOB_ABORTED:
+            self._setstatus(self._t("dl_aborted"), "#f38ba8")
+        else:
+            self._setstatus(f"Error: {job.error}", "#f38ba8")
+            if len(self._batch) == 1:
+                messagebox.showerror(self._t("dl_error"), job.error)
+        if self._batch and not self._expanding and all(j.finished for j in self._batch):
+            self._batch_done()
+
+    def _batch_done(self):
+        self._reset()
+        ok  = [j for j in self._batch if j.state in (JOB_DONE, JOB_SKIPPED)]
+        bad = [j for j in self._batch if j.state == JOB_FAILED]
+        if len(self._batch) > 1:
+            self._setstatus(self._t("all_finished").format(ok=len(ok), bad=len(bad)),
+                            "#f38ba8" if bad else "#a6e3a1")
+        if ok:
+            messagebox.showinfo(self._t("done"),
+                                self._t("saved_to").format(label=ok[-1].label, path=ok[-1].out))
 
     def _abort(self):
-        self.abort_flag.set()
+        sel  = [self.queue.jobs.get(int(i)) for i in self.tree.selection()]
+        jobs = [j for j in sel if j and not j.finished]
+        if jobs:
+            for job in jobs: self.queue.cancel(job)
+        else:
+            self._expand_stop.set()
+            self.queue.cancel_all()
         self._setstatus(self._t("aborting"), "#f38ba8")
 
     def _reset(self):
-        self.dl_btn.config(state="normal")
         self.abort_btn.config(state="disabled")
 
 
+# ── Headless CLI ──────────────────────────────────────────────────────────────
+
+def _read_urls(sources):
+    for src in sources:
+        f = sys.stdin if src == "-" else open(src, "r", encoding="utf-8")
+        try:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield from line.split()
+        finally:
+            if f is not sys.stdin: f.close()
+
+class _JsonLines:
+    def __init__(self, stream, interval):
+        self.stream   = stream
+        self.interval = interval
+        self._lock    = threading.Lock()
+        self._last    = {}    # job id -> (state, time of last progress line)
+
+    def emit(self, event, **fields):
+        line = json.dumps({"event": event, "time": round(time.time(), 3), **fields},
+                          ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def job(self, job):
+        now = time.monotonic()
+        state, last = self._last.get(job.id, (None, 0.0))
+        if state == job.state and now - last < self.interval and not job.finished:
+            return
+        self._last[job.id] = (job.state, now)
+        fields = job.to_dict()
+        event  = "progress" if state == job.state else "job"
+        if event == "progress": fields["bandwidth"] = BANDWIDTH.stats()
+        self.emit(event, **fields)
+
+def _apply_limits(args):
+    settings = _load_settings()
+    rate, windows = _bandwidth_settings(settings)
+    if args.limit_rate is not None: rate = parse_rate(args.limit_rate)
+    if args.rate_window: windows = [parse_window(w) for w in args.rate_window]
+    BANDWIDTH.configure(rate, windows)
+    TUNER.fixed = args.fragments if args.fragments is not None else int(settings.get("fragments") or 0)
+    TELEMETRY.textfile = args.metrics_file or settings.get("metrics_textfile")
+    DISK.staging = args.staging or settings.get("staging_dir") or None
+
+def _start_deps(out):
+    ready = threading.Event()
+    boot  = threading.Thread(target=bootstrap_deps,
+                             args=(lambda msg: out.emit("status", message=msg), ready.set), daemon=True)
+    boot.start()
+    ready.wait()
+    out.emit("deps", yt_dlp=YT_DLP_VERSION if yt_dlp else None, ffmpeg=FFMPEG_PATH)
+    if yt_dlp is None:
+        out.emit("error", message="yt-dlp not available.")
+    return boot
+
+def cli_main(args):
+    out = _JsonLines(sys.stdout, args.progress_interval)
+
+    if args.telemetry_summary:
+        out.emit("telemetry", file=TELEMETRY.path, **TELEMETRY.summary())
+        return 0
+    if args.serve:
+        return serve_main(args, out)
+    try:
+        given = list(args.urls) + list(_read_urls(args.input))
+    except (OSError, UnicodeDecodeError) as e:
+        out.emit("error", message=f"Cannot read URL list: {e}")
+        return 2
+    urls  = dedupe_urls(given)
+    if len(urls) < len(given):
+        out.emit("deduped", given=len(given), unique=len(urls))
+    if not urls and not args.resume:
+        out.emit("error", message="No URLs given.")
+        return 2
+    if args.submit:
+        return submit_main(args, urls, out)
+    try:
+        start, end = parse_items(args.items)
+        _apply_limits(args)
+    except ValueError as e:
+        out.emit("error", message=str(e))
+        return 2
+
+    boot = _start_deps(out)
+    if yt_dlp is None:
+        return 2
+    if args.mode == "mp3" and not FFMPEG_PATH:
+        out.emit("error", message="ffmpeg is required for MP3 mode.")
+        return 2
+
+    queue = DownloadQueue(args.jobs, args.per_host, on_update=out.job, pp_limit=args.pp_workers,
+                          journal=JOURNAL)
+    jobs  = [queue.submit(job) for job in (JOURNAL.resume() if args.resume else [])]
+    stop  = threading.Event()
+
+    def submit(url, title=None, key=None):
+        jobs.append(queue.submit(Job(url, args.mode, fid=args.format, bitrate=args.bitrate,
+                                     out=args.output, title=title, key=key)))
+
+    def expand(url):
+        try:
+            n = expand_playlist(url, lambda e: submit(e["url"], e["title"], e["key"]),
+                                start, end, args.limit, stop)
+            out.emit("playlist", url=url, count=n)
+        except Exception as e:
+            out.emit("playlist", url=url, error=str(e))
+
+    expanders = []
+    for u in urls:
+        if is_collection_url(u) is not False:
+            expanders.append(threading.Thread(target=expand, args=(u,), daemon=True))
+            expanders[-1].start()
+        else:
+            submit(u)
+    try:
+        for t in expanders: t.join()
+        queue.wait()
+    except KeyboardInterrupt:
+        stop.set()
+        JOURNAL.suspend()
+        queue.cancel_all()
+        queue.wait()
+
+    boot.join()
+    counts = {s: sum(j.state == s for j in jobs) for s in JOB_FINISHED}
+    merges = {m: sum(j.progress.get("merge") == m for j in jobs) for m in MERGE_ARGS}
+    out.emit("summary", total=len(jobs), **counts, merges=merges, ydl_pool=YDL_POOL.stats(),
+             archive=ARCHIVE.stats(), artwork=ARTWORK.stats(), bandwidth=BANDWIDTH.stats(),
+             tuning=TUNER.stats(), journal=JOURNAL.stats(), disk=DISK.stats(),
+             meta_cache=META_CACHE.stats())
+    return 0 if counts[JOB_DONE] + counts[JOB_SKIPPED] == len(jobs) else 1
+
+def _parse_args(argv):
+    import argparse
+    p = argparse.ArgumentParser(
+        prog=APP_NAME,
+        description="Without arguments the desktop app starts. Given URLs or --input, "
+                    "downloads run headless and progress is written to stdout as JSON lines.")
+    p.add_argument("urls", nargs="*", help="URLs to download")
+    p.add_argument("-i", "--input", action="append", default=[], metavar="FILE",
+                   help="read URLs from FILE, one per line ('-' for stdin); repeatable")
+    p.add_argument("-m", "--mode", choices=("video", "mp3"), default="video")
+    p.add_argument("-f", "--format", default="best", help="video format id (default: best)")
+    p.add_argument("-b", "--bitrate", choices=MP3_BITRATES, default="320",
+                   help="MP3 bitrate in kbps (default: 320)")
+    p.add_argument("--items", default="", metavar="RANGE",
+                   help="playlist/channel items to take: 1-50, 20-, -20 or 20 (the first 20)")
+    p.add_argument("--limit", type=int, default=None, metavar="N",
+                   help="queue at most N items per playlist/channel")
+    p.add_argument("-o", "--output", default=os.path.expanduser("~/Downloads"),
+                   help="output folder (default: ~/Downloads)")
+    p.add_argument("-j", "--jobs", type=int, default=MAX_DOWNLOADS,
+                   help=f"parallel downloads (default: {MAX_DOWNLOADS})")
+    p.add_argument("--per-host", type=int, default=MAX_PER_HOST,
+                   help=f"parallel downloads per site (default: {MAX_PER_HOST})")
+    p.add_argument("--staging", metavar="DIR",
+                   help="download and post-process in DIR (a fast local disk), then move the "
+                        "finished file to the output folder (default: staging_dir in settings)")
+    p.add_argument("--pp-workers", type=int, default=PP_WORKERS, metavar="N",
+                   help=f"ffmpeg post-processing runs at once (default: {PP_WORKERS})")
+    p.add_argument("--fragments", type=int, default=None, metavar="N",
+                   help="HLS/DASH fragments fetched at once per job; 0 tunes it per site "
+                        "(default: settings, else 0)")
+    p.add_argument("--limit-rate", metavar="RATE",
+                   help="cap the combined download rate, e.g. 500K or 2M (default: settings, "
+                        "else unlimited)")
+    p.add_argument("--rate-window", action="append", default=[], metavar="HH:MM-HH:MM=RATE",
+                   help="use RATE during this time of day, e.g. 09:00-18:00=1M; repeatable, "
+                        "0 means unlimited")
+    p.add_argument("--metrics-file", metavar="FILE",
+                   help="keep Prometheus metrics in FILE for node_exporter's textfile "
+                        "collector (default: metrics_textfile in settings)")
+    p.add_argument("--resume", action="store_true",
+                   help="also queue the unfinished downloads of earlier runs that were "
+                        "interrupted (the desktop app and --serve do this on their own)")
+    p.add_argument("--serve", action="store_true",
+                   help="run as a resident service with a JSON API on localhost; "
+                        "downloads use the options above as defaults")
+    p.add_argument("--submit", action="store_true",
+                   help="hand the URLs to the running service instead of downloading here")
+    p.add_argument("--port", type=int, default=None,
+                   help=f"service port (default: service_port in settings, else {SERVICE_PORT})")
+    p.add_argument("--telemetry-summary", action="store_true",
+                   help="print p50/p95 per job phase from the telemetry log and exit")
+    p.add_argument("--progress-interval", type=float, default=0.5, metavar="SECONDS",
+                   help="minimum time between progress lines per job (default: 0.5)")
+    return p.parse_args(argv)
+
+
+# ── Service mode ──────────────────────────────────────────────────────────────
+
+class _LineQueue:
+    # Stream for one /events client: job threads write, the client's own thread sends
+    def __init__(self, maxlen=10_000):
+        self._lines = collections.deque(maxlen=maxlen)   # a stalled client loses the oldest lines
+        self._cv    = threading.Condition()
+
+    def write(self, line):
+        with self._cv:
+            self._lines.append(line)
+            self._cv.notify()
+
+    def flush(self):
+        pass
+
+    def get(self, timeout):
+        with self._cv:
+            if not self._lines: self._cv.wait(timeout)
+            return self._lines.popleft() if self._lines else None
+
+class Service:
+    # One warm process: dependencies bootstrapped once, the YoutubeDL pool, caches and
+    # queue shared by every request. Jobs fan out to /events subscribers as JSON lines.
+    def __init__(self, args):
+        self.args     = args
+        self.queue    = DownloadQueue(args.jobs, args.per_host, on_update=self._update,
+                                      pp_limit=args.pp_workers, journal=JOURNAL)
+        self.started  = time.time()
+        self.stopping = threading.Event()
+        self._lock    = threading.Lock()
+        self._subs    = set()
+
+    def _update(self, job):
+        with self._lock: subs = list(self._subs)
+        for out in subs: out.job(job)
+
+    def broadcast(self, event, **fields):
+        with self._lock: subs = list(self._subs)
+        for out in subs: out.emit(event, **fields)
+
+    def subscribe(self):
+        out = _JsonLines(_LineQueue(), self.args.progress_interval)
+        with self._lock: self._subs.add(out)
+        return out
+
+    def unsubscribe(self, out):
+        with self._lock: self._subs.discard(out)
+
+    def status(self):
+        return {"version": APP_VERSION, "pid": os.getpid(), "uptime": round(time.time() - self.started, 1),
+                "yt_dlp": YT_DLP_VERSION if yt_dlp else None, "ffmpeg": FFMPEG_PATH,
+                "queue": self.queue.stats(), "ydl_pool": YDL_POOL.stats(),
+                "bandwidth": BANDWIDTH.stats(), "tuning": TUNER.stats(), "journal": JOURNAL.stats(),
+                "extractors": EXTRACTORS.stats(), "disk": DISK.stats(),
+                "meta_cache": META_CACHE.stats()}
+
+    def submit(self, req):
+        a    = self.args
+        urls = req.get("urls") or ([req["url"]] if req.get("url") else [])
+        if isinstance(urls, str): urls = urls.split()
+        if isinstance(urls, list) and all(isinstance(u, str) for u in urls): urls = dedupe_urls(urls)
+        mode, bitrate = req.get("mode", a.mode), str(req.get("bitrate", a.bitrate))
+        if not urls or not all(isinstance(u, str) and u.strip() for u in urls):
+            raise ValueError("No URLs given.")
+        if mode not in ("video", "mp3"): raise ValueError(f"Unknown mode: {mode}")
+        if bitrate not in MP3_BITRATES:  raise ValueError(f"Unknown bitrate: {bitrate}")
+        if mode == "mp3" and not FFMPEG_PATH: raise ValueError("ffmpeg is required for MP3 mode.")
+        fid, out   = req.get("format", a.format), req.get("out") or a.output
+        if not isinstance(fid, (str, int)) or isinstance(fid, bool):
+            raise ValueError(f"Invalid format: {fid!r}")
+        if not isinstance(out, str): raise ValueError(f"Invalid output folder: {out!r}")
+        items = req.get("items", a.items)
+        if items is not None and not isinstance(items, str):
+            raise ValueError(f"Invalid item range: {items!r}")
+        start, end = parse_items(items)
+        limit, priority = req.get("limit", a.limit), req.get("priority", 0)
+        # Checked here: jobs from playlists are made later on another thread, after the reply
+        try:
+            limit    = None if limit is None else int(limit)
+            priority = int(priority)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid limit or priority: {limit!r}, {priority!r}") from None
+        make = lambda url, title=None, key=None: self.queue.submit(
+            Job(url, mode, fid=str(fid), bitrate=bitrate, out=out, priority=priority,
+                title=title, key=key))
+
+        def expand(url):
+            try:
+                n = expand_playlist(url, lambda e: make(e["url"], e["title"], e["key"]),
+                                    start, end, limit, self.stopping)
+                self.broadcast("playlist", url=url, count=n)
+            except Exception as e:
+                self.broadcast("playlist", url=url, error=str(e))
+
+        jobs, playlists = [], []
+        for u in urls:
+            if is_collection_url(u) is not False:
+                playlists.append(u)
+                threading.Thread(target=expand, args=(u,), daemon=True).start()
+            else:
+                jobs.append(make(u))
+        self.queue.forget(SERVICE_KEEP)
+        return {"jobs": [j.to_dict() for j in jobs], "playlists": playlists}
+
+    def info(self, req):
+        url = clean_url(str(req.get("url") or "").strip())
+        if not url: raise ValueError("No URL given.")
+        kind = is_collection_url(url)
+        info = None if kind else META_CACHE.get(url)
+        if info is None and kind is not False:
+            pl = EXTRACTORS.extract("playlist", url)
+            if kind or pl["type"] in PLAYLIST_TYPES:
+                return {"url": url, "playlist": pl}
+        if info is None:
+            info = EXTRACTORS.extract("info", url)
+            if not info: raise ValueError("No info returned — check the URL.")
+            if info.get("_type", "video") == "video": META_CACHE.put(url, info)
+        fields = ("format_id", "ext", "height", "fps", "vcodec", "acodec", "filesize", "filesize_approx")
+        return {"url": url, "id": info.get("id"), "title": info.get("title"),
+                "duration": info.get("duration"), "uploader": info.get("uploader"),
+                "formats": [{k: f.get(k) for k in fields} for f in info.get("formats") or []]}
+
+    def job(self, job_id):
+        try:
+            return self.queue.jobs.get(int(job_id))
+        except ValueError:
+            return None
+
+def _service_server(service, port):
+    import http.server, socket
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        server_version = f"{APP_NAME}/{APP_VERSION}"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, code, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _local(self):
+            # A web page that rebinds its own hostname to 127.0.0.1 still sends that hostname
+            host = (self.headers.get("Host") or "").rsplit(":", 1)[0].strip("[]").lower()
+            if host in ("127.0.0.1", "localhost", "::1"):
+                return True
+            self._reply(403, {"error": "Only local clients may use this service."})
+            return False
+
+        def _body(self):
+            # Browsers can't send application/json cross-origin without a preflight, which
+            # this server never answers, so web pages can't submit or cancel jobs
+            if self.headers.get_content_type() != "application/json":
+                self._reply(415, {"error": "Content-Type must be application/json."})
+                return None
+            try:
+                size = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                size = -1
+            if size < 0:
+                self._reply(400, {"error": "Invalid Content-Length."})
+                return None
+            if size > SERVICE_MAX_BODY:
+                self._reply(413, {"error": "Request too large."})
+                return None
+            try:
+                body = json.loads(self.rfile.read(size) or b"{}")
+                if isinstance(body, dict): return body
+            except ValueError:
+                pass
+            self._reply(400, {"error": "Body must be a JSON object."})
+            return None
+
+        def do_GET(self):
+            if not self._local(): return
+            parts = self.path.split("?", 1)[0].strip("/").split("/")
+            if parts == ["status"]:
+                self._reply(200, service.status())
+            elif parts == ["jobs"]:
+                self._reply(200, {"jobs": [j.to_dict() for j in service.queue.snapshot()]})
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = service.job(parts[1])
+                self._reply(200, job.to_dict()) if job else self._reply(404, {"error": "No such job."})
+            elif parts == ["events"]:
+                self._events()
+            else:
+                self._reply(404, {"error": "Not found."})
+
+        def do_POST(self):
+            if not self._local(): return
+            parts = self.path.split("?", 1)[0].strip("/").split("/")
+            body  = self._body()
+            if body is None: return
+            if parts == ["jobs"]:
+                try:
+                    self._reply(201, service.submit(body))
+                except (ValueError, TypeError) as e:
+                    self._reply(400, {"error": str(e)})
+            elif parts == ["info"]:
+                try:
+                    self._reply(200, service.info(body))
+                except ValueError as e:
+                    self._reply(400, {"error": str(e)})
+                except ExtractorBusy as e:
+                    self._reply(503, {"error": str(e)})
+                except TimeoutError as e:
+                    self._reply(504, {"error": str(e)})
+                except Exception as e:
+                    self._reply(502, {"error": str(e)})
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+                job = service.job(parts[1])
+                if not job: return self._reply(404, {"error": "No such job."})
+                service.queue.cancel(job)
+                self._reply(200, job.to_dict())
+            else:
+                self._reply(404, {"error": "Not found."})
+
+        def _events(self):
+            # JSON lines like the CLI's stdout until the client hangs up; the current state
+            # of unfinished jobs comes first. Blank lines every 15 s notice dead clients.
+            out = service.subscribe()
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                for job in service.queue.active(): out.job(job)
+                while not service.stopping.is_set():
+                    line = out.stream.get(15)
+                    self.wfile.write((line or "\n").encode("utf-8"))
+                    self.wfile.flush()
+            except OSError:
+                pass
+            finally:
+                service.unsubscribe(out)
+
+    class Server(http.server.ThreadingHTTPServer):
+        # POSIX needs SO_REUSEADDR to rebind while old connections sit in TIME_WAIT and still
+        # refuses a second listener; on Windows it would let one share the port instead
+        allow_reuse_address = os.name != "nt"
+
+        def server_bind(self):
+            if os.name == "nt":
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+            super().server_bind()
+
+    return Server((SERVICE_HOST, port), Handler)
+
+def _service_port(args):
+    return args.port if args.port is not None else int(_load_settings().get("service_port") or SERVICE_PORT)
+
+def _service_call(port, method, path, body=None, timeout=5):
+    import urllib.request
+    req = urllib.request.Request(f"http://{SERVICE_HOST}:{port}{path}", method=method,
+                                 data=None if body is None else json.dumps(body).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"})
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))   # never via a proxy
+    with opener.open(req, timeout=timeout) as r:
+        return json.loads(r.read())
+
+def running_service(port=None):
+    # Port of a live service, checked against SERVICE_FILE first since --port 0 picks one at random
+    try:
+        with open(SERVICE_FILE, "r", encoding="utf-8") as f:
+            ports = [json.loads(f.read())["port"]]
+    except (OSError, ValueError, KeyError):
+        ports = []
+    for p in ports + [port or int(_load_settings().get("service_port") or SERVICE_PORT)]:
+        try:
+            if _service_call(p, "GET", "/status", timeout=2).get("pid"): return p
+        except Exception:
+            pass
+    return None
+
+def serve_main(args, out):
+    port = _service_port(args)
+    try:
+        _apply_limits(args)
+        parse_items(args.items)
+    except ValueError as e:
+        out.emit("error", message=str(e))
+        return 2
+    service = Service(args)
+    try:
+        server = _service_server(service, port)   # the bound port is the single-instance lock
+    except OSError as e:
+        other = running_service(port)
+        out.emit("error", message=f"AuroraFetch is already serving on port {other}." if other else
+                                  f"Can't listen on {SERVICE_HOST}:{port}: {e}")
+        return 2
+    boot = _start_deps(out)
+    if yt_dlp is None:
+        server.server_close()
+        return 2
+    EXTRACTORS.start()
+    port = server.server_address[1]
+    os.makedirs(SETTINGS_DIR, exist_ok=True)
+    with open(SERVICE_FILE, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"port": port, "pid": os.getpid(), "started": service.started}))
+    out.emit("serving", url=f"http://{SERVICE_HOST}:{port}", pid=os.getpid())
+    resumed = [service.queue.submit(job) for job in JOURNAL.resume()]
+    if resumed: out.emit("resumed", count=len(resumed))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stopping.set()
+        JOURNAL.suspend()
+        server.server_close()
+        try:
+            os.remove(SERVICE_FILE)
+        except OSError:
+            pass
+    service.queue.cancel_all()
+    service.queue.wait()
+    boot.join()
+    out.emit("summary", **service.status())
+    return 0
+
+def submit_main(args, urls, out):
+    port = running_service(args.port)
+    if not port:
+        out.emit("error", message="No AuroraFetch service is running; start one with --serve.")
+        return 2
+    req = {"urls": urls, "mode": args.mode, "format": args.format, "bitrate": args.bitrate,
+           "out": os.path.abspath(args.output), "items": args.items, "limit": args.limit}
+    try:
+        res = _service_call(port, "POST", "/jobs", req)
+    except Exception as e:
+        try:
+            message = json.loads(e.read())["error"]   # HTTPError carries the service's reason
+        except Exception:
+            message = str(e)
+        out.emit("error", message=message)
+        return 2
+    for job in res["jobs"]: out.emit("job", **job)
+    for url in res["playlists"]: out.emit("playlist", url=url, queued=True)
+    return 0
+
+
 # ── Entry point ───────────────────────────────────────────────────────────────
 
-if __name__ == "__main__":
+def _import_tk():
+    global tk, ttk, messagebox, filedialog
+    import tkinter as tk
+    from tkinter import ttk, messagebox, filedialog
+
+def main(argv=None):
+    _trace("imports")
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        return cli_main(_parse_args(argv))
+    # yt-dlp is by far the slowest import; it loads while Tk starts and the window is built
+    threading.Thread(target=_import_yt_dlp, daemon=True).start()
+    _import_tk()
+    _trace("tk")
     App()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+# Offline benchmarks for AuroraFetch.
+#
+# Everything runs against a local HTTP server that serves synthetic media with
+# configurable latency and per-connection bandwidth, Range requests and HLS
+# fragments. A stand-in yt-dlp extractor resolves http://127.0.0.1:<port>/watch/<id>
+# to that server, so the app's real code paths (YDL pool, run_job, hooks,
+# _download_file) are measured without touching the network.
+#
+#     python benchmarks/bench.py --latency 20 --bandwidth 8M -o before.json
+#
+# Results are written as JSON so runs can be compared across commits. ffmpeg is
+# only needed for the post-processing numbers (and real HLS segments); without it
+# those results are reported as skipped.
+import os, sys, re, json, time, shutil, tempfile, threading, subprocess, platform, statistics
+import http.server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import AuroraFetch as af
+
+CHUNK = 64 * 1024
+
+
+# ── Local media server ────────────────────────────────────────────────────────
+
+class MediaServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, bandwidth=0, files=None, segments=None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency  = latency     # seconds added before every response
+        self.bandwidth = bandwidth  # bytes per second per connection, 0 = unlimited
+        self.files    = files or {}
+        self.segments = segments or []
+        self.requests = 0
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _serve(self, head):
+        srv = self.server
+        srv.requests += 1
+        if srv.latency: time.sleep(srv.latency)
+        path = self.path.split("?")[0]
+        m = re.fullmatch(r"/api/([\w-]+)\.json", path)
+        if m:
+            return self._send(json.dumps(self._meta(m.group(1))).encode(), "application/json", head)
+        if re.fullmatch(r"/watch/[\w-]+", path):
+            return self._send(b"<html><title>bench</title></html>", "text/html", head)
+        m = re.fullmatch(r"/hls/[\w-]+/index\.m3u8", path)
+        if m:
+            return self._send(self._playlist().encode(), "application/vnd.apple.mpegurl", head)
+        m = re.fullmatch(r"/hls/[\w-]+/(\d+)\.ts", path)
+        if m and int(m.group(1)) < len(srv.segments):
+            return self._send(srv.segments[int(m.group(1))], "video/mp2t", head)
+        m = re.fullmatch(r"/(?:media/[\w-]+|file)/([\w.-]+)", path)
+        if m and m.group(1) in srv.files:
+            return self._send(srv.files[m.group(1)], "application/octet-stream", head)
+        self.send_error(404)
+
+    def _meta(self, vid):
+        base, f = self.server.base, self.server.files
+        fmt = lambda fid, name, **kw: {"format_id": fid, "url": f"{base}/media/{vid}/{name}",
+                                       "filesize": len(f[name]), **kw}
+        return {"id": vid, "title": f"Bench {vid}", "duration": 10, "formats": [
+            fmt("http-av", "av.mp4", ext="mp4", vcodec="avc1.64001f", acodec="mp4a.40.2"),
+            fmt("http-video", "video.mp4", ext="mp4", vcodec="avc1.64001f", acodec="none"),
+            fmt("http-audio", "audio.m4a", ext="m4a", vcodec="none", acodec="mp4a.40.2"),
+            {"format_id": "hls", "url": f"{base}/hls/{vid}/index.m3u8", "ext": "mp4",
+             "protocol": "m3u8_native", "vcodec": "avc1.64001f", "acodec": "mp4a.40.2"},
+        ]}
+
+    def _playlist(self):
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:2",
+                 "#EXT-X-MEDIA-SEQUENCE:0"]
+        for i in range(len(self.server.segments)):
+            lines += ["#EXTINF:2.0,", f"{i}.ts"]
+        return "\n".join(lines + ["#EXT-X-ENDLIST", ""])
+
+    def _send(self, body, ctype, head):
+        start, end, status = 0, len(body) - 1, 200
+        rng = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if rng and body:
+            a, b = rng.groups()
+            start = int(a) if a else max(0, len(body) - int(b))
+            end   = min(int(b), len(body) - 1) if a and b else len(body) - 1
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                return self.end_headers()
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        self.end_headers()
+        if head: return
+        bw, pos = self.server.bandwidth, start
+        try:
+            while pos <= end:
+                n = min(CHUNK, end + 1 - pos)
+                t = time.monotonic()
+                self.wfile.write(body[pos:pos + n])
+                pos += n
+                if bw: time.sleep(max(0.0, n / bw - (time.monotonic() - t)))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+# ── Stand-in extractor ────────────────────────────────────────────────────────
+
+def register_extractor():
+    # Puts BenchIE ahead of yt-dlp's generic extractor, which would claim any URL first
+    import yt_dlp.globals
+    from yt_dlp.extractor import import_extractors
+    from yt_dlp.extractor.common import InfoExtractor
+
+    class BenchIE(InfoExtractor):
+        _VALID_URL = r"https?://127\.0\.0\.1:\d+/watch/(?P<id>[\w-]+)"
+
+        def _real_extract(self, url):
+            vid  = self._match_id(url)
+            base = url.split("/watch/")[0]
+            return self._download_json(f"{base}/api/{vid}.json", vid)
+
+    import_extractors()
+    ies  = yt_dlp.globals.extractors.value
+    rest = dict(ies)
+    ies.clear()
+    ies["BenchIE"] = BenchIE
+    ies.update(rest)
+
+
+# ── Media ─────────────────────────────────────────────────────────────────────
+
+def synthetic_media(size, fragments):
+    blob = (bytes(range(256)) * (size // 256 + 1))[:size]
+    step = max(1, size // fragments)
+    return ({"av.mp4": blob, "video.mp4": blob, "audio.m4a": blob[:size // 8], "blob.bin": blob},
+            [blob[i:i + step] for i in range(0, size, step)])
+
+def real_media(ffmpeg, work, seconds):
+    # A test pattern with a tone, split the ways the post-processing benchmarks need it
+    run = lambda *a: subprocess.run([ffmpeg, "-y", "-v", "error", *a], check=True, cwd=work)
+    run("-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30", "-f", "lavfi",
+        "-i", "sine=frequency=440:sample_rate=48000", "-t", str(seconds), "-c:v", "libx264",
+        "-preset", "ultrafast", "-c:a", "aac", "-b:a", "128k", "-shortest", "av.mp4")
+    run("-i", "av.mp4", "-an", "-c:v", "copy", "video.mp4")
+    run("-i", "av.mp4", "-vn", "-c:a", "copy", "audio.m4a")
+    run("-i", "av.mp4", "-vn", "-c:a", "libopus", "-b:a", "128k", "audio.webm")
+    run("-i", "av.mp4", "-c", "copy", "-f", "hls", "-hls_time", "2", "-hls_list_size", "0",
+        "-hls_segment_filename", "%d.ts", "index.m3u8")
+    segs = sorted((f for f in os.listdir(work) if f.endswith(".ts")), key=lambda f: int(f[:-3]))
+    read = lambda f: open(os.path.join(work, f), "rb").read()
+    return {f: read(f) for f in ("av.mp4", "video.mp4", "audio.m4a")}, [read(f) for f in segs]
+
+
+# ── Benchmarks ────────────────────────────────────────────────────────────────
+
+def _stats(values):
+    values = sorted(values)
+    if not values: return None
+    return {"n": len(values), "min": round(values[0], 4), "median": round(statistics.median(values), 4),
+            "p95": round(values[max(0, -(-len(values) * 95 // 100) - 1)], 4),
+            "max": round(values[-1], 4), "mean": round(statistics.fmean(values), 4)}
+
+def bench_fetch(srv, repeat):
+    # Info extraction through the YDL pool: the first lease pays for YoutubeDL() itself
+    af.YDL_POOL = af.YDLPool()
+    times = []
+    for i in range(repeat + 1):
+        t = time.perf_counter()
+        with af.YDL_POOL.lease("info", af.INFO_OPTS) as ydl:
+            ydl.extract_info(f"{srv.base}/watch/fetch{i}", download=False)
+        times.append(time.perf_counter() - t)
+    return {"cold_s": round(times[0], 4), "warm_s": _stats(times[1:]),
+            "pool": af.YDL_POOL.stats()}
+
+def bench_download(srv, repeat, work):
+    out = {}
+    for fid in ("http-av", "hls"):
+        rates, totals, failed = [], [], []
+        for i in range(repeat):
+            dest = tempfile.mkdtemp(dir=work)
+            job  = af.Job(f"{srv.base}/watch/{fid}{i}", fid=fid, out=dest)
+            af.run_job(job)
+            m = job.marks
+            if job.state != af.JOB_DONE:
+                failed.append(job.error); continue
+            dl = m["download_end"] - m["extract_end"]
+            rates.append(job.received / dl / 1_048_576 if dl > 0 else 0)
+            totals.append(m["finished"] - m["extract_start"])
+            shutil.rmtree(dest, ignore_errors=True)
+        out[fid] = {"mb_per_s": _stats(rates), "job_s": _stats(totals),
+                    "failed": len(failed), "errors": failed[:3]}
+    return out
+
+def bench_hooks(calls):
+    job  = af.Job("https://example.com/hook")
+    hook = af._progress_hook(job)
+    t = time.perf_counter()
+    for i in range(calls):
+        hook({"status": "downloading", "downloaded_bytes": i * CHUNK, "total_bytes": calls * CHUNK,
+              "speed": 1e7, "eta": 1, "info_dict": {"title": "bench"}})
+    per_call = (time.perf_counter() - t) / calls
+    return {"calls": calls, "us_per_call": round(per_call * 1e6, 3)}
+
+URL_FORMS = ("https://www.youtube.com/watch?v={yt}&t=42", "https://youtu.be/{yt}?si=share",
+             "https://m.youtube.com/shorts/{yt}", "https://music.youtube.com/watch?v={yt}&list=RDAMVM",
+             "https://vimeo.com/{n}", "https://player.vimeo.com/video/{n}?autoplay=1",
+             "https://x.com/user/status/{n}?s=20", "https://www.tiktok.com/@user/video/{n}",
+             "https://example.com/media/{n}?utm_source=feed&id={n}")
+
+def bench_urls(count, repeat):
+    # Pasted lists where every video shows up in several forms; cold = empty normalizer cache
+    rng  = __import__("random").Random(1)
+    ids  = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-")
+                    for _ in range(11)) for _ in range(count // 3)]
+    urls = [rng.choice(URL_FORMS).format(yt=ids[i % len(ids)], n=10_000_000 + i % len(ids))
+            for i in range(count)]
+    cold, warm, unique = [], [], 0
+    for _ in range(repeat):
+        af.normalize_url.cache_clear()
+        t = time.perf_counter()
+        unique = len(af.dedupe_urls(urls))
+        cold.append(count / (time.perf_counter() - t))
+        t = time.perf_counter()
+        af.dedupe_urls(urls)
+        warm.append(count / (time.perf_counter() - t))
+    return {"urls": count, "unique": unique, "cold_urls_per_s": _stats(cold),
+            "warm_urls_per_s": _stats(warm)}
+
+def bench_download_file(srv, repeat, work):
+    body = srv.files["blob.bin"]
+    sha  = __import__("hashlib").sha256(body).hexdigest()
+    out  = {}
+    for conns in sorted({1, af.DL_CONNECTIONS}):
+        rates = []
+        for i in range(repeat):
+            dest = os.path.join(work, f"dl{conns}-{i}.bin")
+            t = time.perf_counter()
+            af._download_file(f"{srv.base}/file/blob.bin", dest, sha256=sha, connections=conns)
+            rates.append(len(body) / (time.perf_counter() - t) / 1_048_576)
+            os.remove(dest)
+        out[f"connections_{conns}"] = {"mb_per_s": _stats(rates)}
+    return out
+
+def bench_postprocess(ffmpeg, media, repeat):
+    if not ffmpeg: return {"skipped": "ffmpeg not found"}
+    j = lambda f: os.path.join(media, f)
+    cases = {
+        "merge_copy": ["-i", j("video.mp4"), "-i", j("audio.m4a"), "-map", "0:v:0", "-map", "1:a:0",
+                       *af.MERGE_ARGS["copy"], j("out_copy.mp4")],
+        "merge_aac":  ["-i", j("video.mp4"), "-i", j("audio.webm"), "-map", "0:v:0", "-map", "1:a:0",
+                       *af.MERGE_ARGS["aac"], j("out_aac.mp4")],
+        "extract_mp3": ["-i", j("audio.m4a"), "-vn", "-c:a", "libmp3lame", "-b:a", "320k",
+                        j("out.mp3")],
+    }
+    out = {}
+    for name, args in cases.items():
+        times = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            subprocess.run([ffmpeg, "-y", "-v", "error", *args], check=True)
+            times.append(time.perf_counter() - t)
+        out[name] = {"seconds": _stats(times)}
+    return out
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+BENCHES = ("fetch", "download", "hooks", "urls", "download_file", "postprocess")
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run(args):
+    af._import_yt_dlp()
+    if af.yt_dlp is None:
+        sys.exit("yt-dlp is required: pip install yt-dlp")
+    register_extractor()
+    only   = set(args.only.split(",")) if args.only else set(BENCHES)
+    ffmpeg = args.ffmpeg or shutil.which("ffmpeg")
+    work   = tempfile.mkdtemp(prefix="aurora-bench-")
+    # Keep the user's archive, telemetry and cache out of it; the app's own ffmpeg
+    # handling stays off so every download is a single format
+    af.ARCHIVE, af.TELEMETRY = af.DownloadArchive(os.path.join(work, "archive.db")), \
+                               af.Telemetry(os.path.join(work, "telemetry.jsonl"))
+    af.META_CACHE  = af.MetadataCache(os.path.join(work, "metadata.db"))
+    af.FFMPEG_PATH = None
+    try:
+        size = int(args.size * 1_048_576)
+        files, segments = synthetic_media(size, args.fragments)
+        media = os.path.join(work, "media")
+        os.makedirs(media)
+        if ffmpeg:
+            real, segments = real_media(ffmpeg, media, args.seconds)
+            files.update({k: v for k, v in real.items() if k != "av.mp4"})
+        srv = MediaServer(args.latency / 1000, af.parse_rate(args.bandwidth), files, segments).start()
+        results = {}
+        for name in BENCHES:
+            if name not in only: continue
+            t = time.perf_counter()
+            if   name == "fetch":         results[name] = bench_fetch(srv, args.repeat)
+            elif name == "download":      results[name] = bench_download(srv, args.repeat, work)
+            elif name == "hooks":         results[name] = bench_hooks(args.hook_calls)
+            elif name == "urls":          results[name] = bench_urls(args.urls, args.repeat)
+            elif name == "download_file": results[name] = bench_download_file(srv, args.repeat, work)
+            elif name == "postprocess":   results[name] = bench_postprocess(ffmpeg, media, args.repeat)
+            results[name]["wall_s"] = round(time.perf_counter() - t, 3)
+        srv.shutdown()
+        return {"commit": _git_commit(), "time": round(time.time(), 3),
+                "python": platform.python_version(), "platform": platform.platform(),
+                "yt_dlp": af.YT_DLP_VERSION, "ffmpeg": ffmpeg,
+                "config": {"latency_ms": args.latency, "bandwidth": args.bandwidth,
+                           "size_mb": args.size, "fragments": len(segments),
+                           "repeat": args.repeat, "requests": srv.requests},
+                "results": results}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+def _parse_args(argv):
+    import argparse
+    p = argparse.ArgumentParser(description="Run AuroraFetch benchmarks against a local media server.")
+    p.add_argument("--only", metavar="NAMES", help=f"comma-separated subset of: {', '.join(BENCHES)}")
+    p.add_argument("--latency", type=float, default=0, metavar="MS",
+                   help="delay before every server response (default: 0)")
+    p.add_argument("--bandwidth", default="0", metavar="RATE",
+                   help="per-connection server bandwidth, e.g. 8M (default: unlimited)")
+    p.add_argument("--size", type=float, default=32, metavar="MB",
+                   help="size of the synthetic download (default: 32)")
+    p.add_argument("--fragments", type=int, default=16, help="HLS fragments without ffmpeg (default: 16)")
+    p.add_argument("--seconds", type=int, default=20,
+                   help="length of the ffmpeg test clip (default: 20)")
+    p.add_argument("--repeat", type=int, default=5, help="runs per measurement (default: 5)")
+    p.add_argument("--hook-calls", type=int, default=100_000,
+                   help="progress-hook calls to time (default: 100000)")
+    p.add_argument("--urls", type=int, default=5000,
+                   help="pasted URLs to canonicalise and dedupe (default: 5000)")
+    p.add_argument("--ffmpeg", help="ffmpeg binary (default: from PATH)")
+    p.add_argument("-o", "--output", help="write the JSON here instead of stdout")
+    return p.parse_args(argv)
+
+def main(argv=None):
+    args   = _parse_args(sys.argv[1:] if argv is None else argv)
+    result = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(result + "\n")
+    else:
+        print(result)
+
+if __name__ == "__main__":
+    main()